@@ -0,0 +1,70 @@
+
+# coding: utf-8
+
+'''
+Process-wide cache of every image under images/.
+
+preload() decodes each file once, converts it to the display format and
+keeps the surface, so spawning a vehicle or drawing a signal never touches
+the disk. It also renders every vehicle at every rotation step of a turn,
+so turning is a table lookup instead of a pygame.transform.rotate() per
+vehicle per frame. Surfaces are shared between all users and must not be
+drawn on.
+'''
+
+import os
+import pygame
+
+
+imagesDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+images = {}          # path relative to images/, with '/' separators -> Surface
+vehicleImages = {}   # (direction, vehicleClass) -> Surface
+
+# (direction, vehicleClass) -> {signed angle: (Surface, (width, height))}
+rotationFrames = {}
+
+
+def preload(rotationAngle=3):
+
+    # needs pygame.display.set_mode() to have been called, for convert()
+    if images:
+        return
+
+    for root, dirs, files in os.walk(imagesDir):
+        for name in files:
+            if not name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                continue
+            path = os.path.join(root, name)
+            surface = pygame.image.load(path)
+            if surface.get_flags() & pygame.SRCALPHA:
+                surface = surface.convert_alpha()
+            else:
+                surface = surface.convert()
+            key = os.path.relpath(path, imagesDir).replace(os.sep, '/')
+            images[key] = surface
+
+            direction = os.path.basename(root)
+            if direction in ('right', 'down', 'left', 'up'):
+                vehicleImages[(direction, os.path.splitext(name)[0])] = surface
+
+    # lane 0 turns rotate by +angle and lane 2 turns by -angle
+    for key, surface in vehicleImages.items():
+        frames = {}
+        for angle in range(-90, 91, rotationAngle):
+            rotated = pygame.transform.rotate(surface, angle) if angle else surface
+            frames[angle] = (rotated, rotated.get_size())
+        rotationFrames[key] = frames
+
+
+def rotated(direction, vehicleClass, angle):
+    return rotationFrames[(direction, vehicleClass)][angle][0]
+
+
+def image(name):
+    return images[name]
+
+
+def path(name):
+    # absolute path of a non-image asset such as the siren sound
+    return os.path.join(imagesDir, name)
@@ -0,0 +1,99 @@
+
+# coding: utf-8
+
+'''
+Live vehicle counts from the YOLO app for engine.py.
+
+The V8 app counts the vehicles of every frame per lane polygon and appends
+one JSON line per frame to a count stream (see "Yolo V8/lanes.py"):
+    {"frame": 12, "time": 0.4,
+     "lanes": [{"name": "north-0", "direction": "down", "counts": {"car": 3, "bus": 1}}, ...]}
+A DetectorFeed follows that file as it grows, and from the start again
+when a new video run truncates it, and keeps the counts of the latest
+frame. Attached to a Simulation as its countFeed, setTime() takes the
+vehicles waiting on an approach from the camera instead of from the
+simulated roads. counts() is None for an approach the feed has no lane of:
+no file or no frame yet, or lanes drawn without that direction (the app's
+whole-frame lane has none). setTime() then warns and falls back to the
+simulated queue rather than timing the green from zero vehicles.
+
+Detector class names are matched to engine.vehicleClasses ignoring case,
+spaces, '_' and '-'; the COCO two-wheelers count as bikes, and classes the
+signal timing has no weight for are dropped.
+'''
+
+import json
+import os
+
+import engine
+
+
+aliases = {'motorcycle': 'bike', 'motorbike': 'bike', 'bicycle': 'bike', 'autorickshaw': 'rickshaw',
+           'firetruck': 'fireTruck', 'fireengine': 'fireTruck'}
+
+
+def vehicleClass(name):
+    # the engine.vehicleClasses entry a detector class name stands for, or None
+    key = name.lower().replace(' ', '').replace('_', '').replace('-', '')
+    for vehicleClass in engine.vehicleClasses:
+        if vehicleClass.lower() == key:
+            return vehicleClass
+    return aliases.get(key)
+
+
+class DetectorFeed:
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0       # bytes of the stream read so far
+        self.partial = b''    # a line the app has not finished writing yet
+        self.latest = None    # the last complete record
+        self.columns = {}     # detector class name -> engine.vehicleClasses index, or None
+
+    def poll(self):
+        # read whatever the app appended since the last call
+        try:
+            with open(self.path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < self.offset:
+                    # truncated by a new run: read it from the start
+                    self.offset = 0
+                    self.partial = b''
+                    self.latest = None
+                file.seek(self.offset)
+                data = file.read()
+        except FileNotFoundError:
+            return
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in reversed(lines):
+            try:
+                self.latest = json.loads(line)
+                break
+            except ValueError:
+                continue   # blank, or cut short when the app was stopped
+
+    def column(self, name):
+        if name not in self.columns:
+            found = vehicleClass(name)
+            self.columns[name] = None if found is None else engine.vehicleClasses.index(found)
+        return self.columns[name]
+
+    def counts(self, direction):
+        # vehicles of each class, in engine.vehicleClasses order, in the lanes
+        # of direction (a direction number) in the latest frame; None if the
+        # feed has no lane of direction
+        self.poll()
+        if self.latest is None:
+            return None
+        name = engine.directionNumbers[direction]
+        lanes = [lane for lane in self.latest['lanes'] if lane.get('direction') == name]
+        if not lanes:
+            return None
+        counts = [0] * len(engine.vehicleClasses)
+        for lane in lanes:
+            for className, n in lane['counts'].items():
+                column = self.column(className)
+                if column is not None:
+                    counts[column] += n
+        return counts
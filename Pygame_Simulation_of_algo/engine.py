@@ -0,0 +1,837 @@
+
+# coding: utf-8
+
+'''
+Headless, time-stepped engine for the 4-way signal simulation.
+
+The threads of the pygame script (generateVehicles, skipTimer,
+simulationTime) run here as generators
+on a simulated clock: every `yield n` stands for a `time.sleep(n)`, and all
+vehicles move once per frame, FPS frames per simulated second. The signal
+cycle itself is the state machine in signal_controller.py, ticked once per
+simulated second from the same event queue, and woken early by the
+priority vehicle registry (priority_registry.py). Nothing sleeps
+and nothing is drawn, so a whole simTime episode runs as fast as the CPU
+allows and a fixed seed always gives the same counts; a 400 s episode
+(24000 frames) takes about 0.6 s on one core. The visual mode steps
+this same engine FPS times per second of wall time, however often it
+manages to redraw, so it gives the same counts too.
+
+All episode state lives in a Simulation instance with its own RNG; the
+module level values below are the defaults every instance starts from.
+Messages go through a levelled, batched logger and the signal state of
+every second to an in-memory trace (simlog.py). A Simulation made with
+record=True keeps every spawn in `spawnLog` (None otherwise, so a run that
+is not recorded holds nothing per spawn), and a Simulation given a recorded
+scenario (scenario.py) replays its spawns instead of drawing new ones.
+'''
+
+import heapq
+import math
+import os
+import random
+import struct
+
+import metrics
+import priority_registry
+import scenario
+import signal_controller
+import simlog
+import vehicle_store
+
+
+# Default values of signal times
+defaultRed = 195
+defaultYellow = 5
+# defaultGreen = 20
+defaultMinimum = 10
+defaultMaximum = 60
+
+noOfSignals = 4
+simTime = 400       # total simulation time
+FPS = 60            # frames per simulated second
+
+weightage = 0.33
+hotspot_region = False
+traffic_distribution = []
+
+# Average times for vehicles to pass the intersection
+carTime = 1.5             # 50km/h
+bikeTime = 1            # 60km/h
+rickshawTime = 2          # 60km/h
+busTime = 2.5            # 45km/h
+truckTime = 2.5           # 45km/h
+ambulanceTime = 1
+fireTruckTime = 1
+policeCarTime = 1
+
+noOfLanes = 2
+roadLanes = 3
+
+# Seconds between forced priority vehicles, as update_flag_value() would
+# request them; None leaves it to the flag alone
+priorityInterval = None
+
+# Red signal time at which vehicles will be detected at a signal (when detection will start running)
+detectionTime = 5
+
+speeds = {'car': 2.25, 'bus': 1.8, 'truck': 1.8,
+          'rickshaw': 2, 'bike': 2.5,
+          'ambulance': 3, 'fireTruck': 3}  # average speeds of vehicles
+
+
+# weather , congestion,
+weatherData = {
+
+  'Thunderstorm': 0,
+  'Drizzle': 0.3,
+  'rain': 0.4,
+  'Snow': 0.3,
+  'Mist': 0.4,
+  'Smoke': 0.2,
+  'Haze': 0.3,
+  'Fog': 0.2,
+  'Sand': 0.1,
+  'Dust': 0.1,
+  'Tornado': 0,
+  'clear sky': 1,
+  'few clouds': 0.8,
+  'Scattered clouds': 0.7,
+  'Broken clouds': 0.5,
+  'overcast clouds': 0.3
+
+}
+
+# Screensize, used for the on-screen checks of skipTimer
+screenWidth = 1400
+screenHeight = 800
+
+# Coordinates of start
+x = {'right': [-100, -100, -100], 'down': [750, 720, 692],
+     'left': [1500, 1500, 1500], 'up': [602, 630, 661]}
+y = {'right': [349, 375, 400], 'down': [-100, -100, -100],
+     'left': [488, 458, 430], 'up': [900, 900, 900]}
+
+# Coordinates of stop lines
+stopLines = {'right': 590, 'down': 330, 'left': 800, 'up': 535}
+defaultStop = {'right': 580, 'down': 320, 'left': 810, 'up': 545}
+
+firstStep = {'right': 430, 'down': 170, 'left': 950, 'up': 695}
+
+secondStep = {'right': 280, 'down': 20, 'left': 1100, 'up': 845}
+
+
+mid = {'right': {'x': 720, 'y': 445}, 'down': {'x': 695, 'y': 460},
+       'left': {'x': 680, 'y': 425}, 'up': {'x': 695, 'y': 400}}
+rotationAngle = 3
+
+# Gap between vehicles
+stoppingGap = 25    # stopping gap
+movingGap = 25   # moving gap
+
+vehicleTypes = {0: 'car', 1: 'bus', 2: 'truck', 3: 'rickshaw',
+                4: 'bike', 5: 'ambulance', 6: 'fireTruck'}
+
+directionNumbers = {0: 'right', 1: 'down', 2: 'left', 3: 'up'}
+
+
+def readImageSize(path):
+
+    # width and height straight from the PNG header, so the engine
+    # knows the vehicle extents without loading pygame
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    return struct.unpack('>II', header[16:24])
+
+
+imagesDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+vehicleSizes = {direction: {vehicleClass: readImageSize(os.path.join(imagesDir, direction, vehicleClass + '.png'))
+                            for vehicleClass in speeds}
+                for direction in directionNumbers.values()}
+
+
+def rotatedSize(width, height, angle):
+
+    # size of the surface pygame.transform.rotate() returns for this angle
+    if(angle % 90 == 0):
+        if(int(angle / 90) % 2):
+            return height, width
+        return width, height
+
+    radangle = angle * 0.01745329251994329
+    cangle = math.cos(radangle)
+    sangle = math.sin(radangle)
+    cx, cy = cangle * width, cangle * height
+    sx, sy = sangle * width, sangle * height
+    newWidth = int(max(abs(cx + sy), abs(cx - sy), abs(-cx + sy), abs(-cx - sy)))
+    newHeight = int(max(abs(sx + cy), abs(sx - cy), abs(-sx + cy), abs(-sx - cy)))
+    return newWidth, newHeight
+
+
+# Movement rules of every (direction, lane) for the vehicle store, see
+# vehicle_store.py for how they are read.
+# approach road: (axis, sign) of motion
+approachRules = {'right': (0, 1), 'down': (1, 1),
+                 'left': (0, -1), 'up': (1, -1)}
+
+# how far past the stop line a lane 0 vehicle goes before it turns
+turnOffsets = {'right': 40, 'down': 50, 'left': 60, 'up': 45}
+
+# (dx, dy) for every rotation step of a turn
+turnSteps = {('right', 0): (2.4, -2.8), ('right', 2): (2, 1.8),
+             ('down', 0): (1.2, 1.8), ('down', 2): (-2.5, 2),
+             ('left', 0): (-1, 1.2), ('left', 2): (-1.8, -2.5),
+             ('up', 0): (-2, -1.5), ('up', 2): (1, -1)}
+
+# exit road after the turn: (axis, sign) of motion
+exitRules = {('right', 0): (1, -1), ('right', 2): (1, 1),
+             ('down', 0): (0, 1), ('down', 2): (0, -1),
+             ('left', 0): (1, 1), ('left', 2): (1, -1),
+             ('up', 0): (0, -1), ('up', 2): (0, 1)}
+
+
+def buildLaneParams():
+
+    laneParams = []
+    for i in range(noOfSignals):
+        direction = directionNumbers[i]
+        axis, sign = approachRules[direction]
+        for lane in range(roadLanes):
+            if(lane == 0):
+                turnAt = sign * stopLines[direction] + turnOffsets[direction]
+            elif(lane == 2):
+                turnAt = sign * mid[direction]['xy'[axis]]
+            else:
+                turnAt = math.inf
+            dx, dy = turnSteps.get((direction, lane), (0, 0))
+            exitAxis, exitSign = exitRules.get((direction, lane), (0, 0))
+            # where the lane runs across the road, to place turned vehicles
+            lateral = (y if axis == 0 else x)[direction][lane]
+            laneParams.append([axis, sign, sign * stopLines[direction], turnAt,
+                               dx, dy, exitAxis, exitSign, lateral])
+    return laneParams
+
+
+vehicleClasses = list(speeds)
+
+
+def sizeKey(direction, vehicleClass):
+    return list(directionNumbers.values()).index(direction) * len(vehicleClasses) + vehicleClasses.index(vehicleClass)
+
+
+def buildSizeTable():
+
+    # image size of every (direction, vehicleClass) at every rotation step of a turn
+    return [[rotatedSize(*vehicleSizes[direction][vehicleClass], step * rotationAngle)
+             for step in range(90 // rotationAngle + 1)]
+            for direction in directionNumbers.values() for vehicleClass in vehicleClasses]
+
+
+laneParams = buildLaneParams()
+sizeTable = buildSizeTable()
+
+
+class TrafficSignal:
+    def __init__(self, red, yellow, green, minimum=0, maximum=0):
+        self.red = red
+        self.yellow = yellow
+        self.green = green
+        self.minimum = minimum
+        self.maximum = maximum
+        self.totalGreenTime = 0
+        self.signalText = "---"
+
+
+class TrustSignal:
+    def __init__(self, src_lat, src_long, dest_lat, dest_long):
+        self.congestion_time = ""
+        self.congestion_score = 0.00
+        self.weather_score = 0.00
+        self.weather_description = ""
+        self.hotspot_score = 0.00
+        self.src_lat = src_lat
+        self.src_long = src_long
+        self.dest_lat = dest_lat
+        self.dest_long = dest_long
+        self.trust_dynamic = 0.00
+        self.trust_static = 0.00
+
+
+# Settings every Simulation copies from the defaults above and that can be
+# overridden per instance, e.g. Simulation(seed, defaultMinimum=5)
+settings = ('defaultRed', 'defaultYellow', 'defaultMinimum', 'defaultMaximum', 'detectionTime',
+            'carTime', 'bikeTime', 'rickshawTime', 'busTime', 'truckTime',
+            'ambulanceTime', 'fireTruckTime', 'policeCarTime', 'noOfLanes',
+            'weightage', 'hotspot_region', 'traffic_distribution', 'simTime', 'priorityInterval')
+
+
+class Vehicle:
+
+    # a handle on one row of the vehicle store; position and flags live in
+    # the store's arrays and are moved by store.move_all()
+    def __init__(self, sim, lane, vehicleClass, direction_number, direction, will_turn, active=False):
+        self.lane = lane
+        self.vehicleClass = vehicleClass
+        self.speed = speeds[vehicleClass]
+        self.direction_number = direction_number
+        self.active = active
+        self.direction = direction
+        self.willTurn = will_turn
+        self.store = sim.store
+        self.priorityVehicles = sim.priorityVehicles
+        vehicles = sim.vehicles
+        stops = sim.stops
+        vehicles[direction][lane].append(self)
+        self.index = len(vehicles[direction][lane]) - 1
+
+        leader = vehicles[direction][lane][self.index-1]
+        width, height = vehicleSizes[direction][vehicleClass]
+
+        if(direction == 'right'):
+
+            # if more than 1 vehicle in the lane of vehicle before it has crossed stop line
+            if(len(vehicles[direction][lane]) > 1 and leader.crossed == 0):
+                # setting stop coordinate as: stop coordinate of next vehicle - width of next vehicle - gap
+                stop = leader.stop - leader.getRect()[0] - stoppingGap
+            else:
+                stop = defaultStop[direction]
+
+            # Set new starting and stopping coordinate
+            stops[direction][lane] -= width + stoppingGap
+
+        elif(direction == 'left'):
+
+            if(len(vehicles[direction][lane]) > 1 and leader.crossed == 0):
+                stop = leader.stop + leader.getRect()[0] + stoppingGap
+            else:
+                stop = defaultStop[direction]
+
+            stops[direction][lane] += width + stoppingGap
+
+        elif(direction == 'down'):
+
+            if(len(vehicles[direction][lane]) > 1 and leader.crossed == 0):
+                stop = leader.stop - leader.getRect()[1] - stoppingGap
+            else:
+                stop = defaultStop[direction]
+
+            stops[direction][lane] -= height + stoppingGap
+
+        elif(direction == 'up'):
+
+            if(len(vehicles[direction][lane]) > 1 and leader.crossed == 0):
+                stop = leader.stop + leader.getRect()[1] + stoppingGap
+            else:
+                stop = defaultStop[direction]
+
+            stops[direction][lane] += height + stoppingGap
+
+        self.row = self.store.add(lane, direction_number, vehicleClasses.index(vehicleClass), sizeKey(direction, vehicleClass),
+                                  self.speed, x[direction][lane], y[direction][lane], stop, will_turn, active)
+
+        sim.simulation[self.row] = self
+        for listener in sim.spawnListeners:
+            listener(self)
+
+        if active:
+            sim.priorityVehicles.join(self)
+
+    x = property(lambda self: float(self.store.pos[self.row, 0]))
+    y = property(lambda self: float(self.store.pos[self.row, 1]))
+    wait_time = property(lambda self: self.store.waited[self.row] / FPS)
+    turned = property(lambda self: int(self.store.turned[self.row]))
+    rotateAngle = property(lambda self: int(self.store.rotateAngle[self.row]))
+
+    def interpolated(self, alpha):
+        # position `alpha` of the way from before the last step to now
+        last = self.store.lastPos[self.row]
+        pos = self.store.pos[self.row]
+        return tuple(float(v) for v in last + (pos - last) * alpha)
+
+    @property
+    def crossed(self):
+        return int(self.store.crossed[self.row])
+
+    @property
+    def stop(self):
+        return float(self.store.stop[self.row])
+
+    @stop.setter
+    def stop(self, value):
+        self.store.setStop(self.row, value)
+
+    def getRect(self):
+        # (width, height) of the vehicle image at its current rotation,
+        # cached in the store whenever the image changes
+        width, height = self.store.size[self.row]
+        return float(width), float(height)
+
+
+class Simulation:
+
+    # One intersection: its signals, roads, vehicles, clock and RNG. Nothing
+    # is shared between instances, so several can run in one process, and
+    # reset() starts a new episode on the same instance.
+    noOfSignals = noOfSignals
+    directionNumbers = directionNumbers
+
+    def __init__(self, seed=None, verbose=True, replay=None, record=False, **overrides):
+
+        for name in settings:
+            value = globals()[name]
+            setattr(self, name, list(value) if isinstance(value, list) else value)
+        for name, value in overrides.items():
+            if name not in settings:
+                raise TypeError(f"unknown simulation setting {name!r}")
+            setattr(self, name, value)
+
+        # verbose: True for messages, False for none, 'debug' for the
+        # signal status every second as well
+        self.logger = simlog.SimLogger(simlog.levelFor(verbose))
+        self.replay = replay     # a scenario.Scenario to spawn from instead of the RNG
+        self.record = record     # keep the spawns in spawnLog, to save as a scenario
+        # a detector_feed.DetectorFeed to take the queued vehicles from, as
+        # counted by the YOLO app, instead of from the simulated roads
+        self.countFeed = None
+        self.feedMissing = set()   # directions the feed had no lane of, warned about
+        self.rng = random.Random()
+        self.distribution = []
+
+        # callables run with every new Vehicle, e.g. to attach a sprite,
+        # with every Vehicle retired after leaving the screen, and with the
+        # simulation every simulated second, e.g. to log the signal state
+        self.spawnListeners = []
+        self.retireListeners = []
+        self.tickListeners = []
+
+        self.reset(seed)
+
+    def log(self, *args):
+        self.logger.info(*args)
+
+    def update_flag_value(self):
+        self.priority_vehicle_flag = True
+        self.log(self.priority_vehicle_flag)
+
+    # Initialization of signals with default values
+    def initialize(self):
+
+        ts1 = TrafficSignal(0, self.defaultYellow, self.defaultMaximum,
+                            self.defaultMinimum, self.defaultMaximum)
+        self.signals.append(ts1)
+        ts2 = TrafficSignal(ts1.red+ts1.yellow+ts1.green, self.defaultYellow,
+                            self.defaultMaximum, self.defaultMinimum, self.defaultMaximum)
+        self.signals.append(ts2)
+        ts3 = TrafficSignal(130, self.defaultYellow,
+                            self.defaultMaximum, self.defaultMinimum, self.defaultMaximum)
+        self.signals.append(ts3)
+        ts4 = TrafficSignal(195, self.defaultYellow,
+                            self.defaultMaximum, self.defaultMinimum, self.defaultMaximum)
+        self.signals.append(ts4)
+
+        self.congestion.append(TrustSignal(30.733102, 76.779132, 30.730232, 76.774572))
+        self.congestion.append(TrustSignal(30.732824, 76.780174, 30.727993, 76.784416))
+        self.congestion.append(TrustSignal(30.733939, 76.779321, 30.739082, 76.774892))
+        self.congestion.append(TrustSignal(30.733919, 76.780622, 30.740305, 76.790887))
+
+    def reset(self, seed=None):
+
+        # start a fresh episode: new signals, empty roads, clock at zero and
+        # the simulated threads started in the order the script started them
+        self.signals = []
+        self.congestion = []
+        self.vehicles = {direction: {0: [], 1: [], 2: [], 'crossed': 0}
+                         for direction in directionNumbers.values()}
+        self.stops = {direction: [defaultStop[direction]] * roadLanes
+                      for direction in directionNumbers.values()}
+        self.simulation = {}     # store row -> Vehicle on the roads
+        self.metrics = metrics.RunMetrics(FPS, directionNumbers)
+        self.store = vehicle_store.VehicleStore(laneParams, sizeTable, rotationAngle, len(vehicleClasses))
+        self.priorityVehicles = priority_registry.PriorityRegistry()
+        self.Emergency = False   # a priority vehicle is on the roads
+        self.displaySkip = False
+        self.sirenOn = False
+        self.currentGreen = 0   # Indicates which signal is green
+        self.nextGreen = (self.currentGreen+1) % noOfSignals
+        self.currentYellow = 0   # Indicates whether yellow signal is on or off
+        self.timeElapsed = 0
+        self.frameCount = 0
+        self.finished = False
+        self.priority_vehicle_flag = False
+        self.rng.seed(seed)
+        self.spawnLog = scenario.Scenario() if self.record else None
+        self.trace = simlog.SignalTrace(noOfSignals)
+
+        self.initialize()
+
+        # event queue of (wake-up frame, order, task); a task is called when
+        # it is due and returns the seconds until it is due again, tasks due
+        # on the same frame run in the order the script started its threads
+        self.controller = signal_controller.SignalController(self)
+        self.controllerDue = 0
+        self.priorityVehicles.listeners.append(self.controller.priorityEvent)
+        self.events = []
+        spawner = self.generateVehicles() if self.replay is None else self.replayVehicles()
+        for order, task in enumerate((self.simulationTime().__next__, self.controllerTick,
+                                      spawner.__next__, self.skipTimer().__next__,
+                                      self.retireVehicles().__next__)):
+            heapq.heappush(self.events, (0, order, task))
+
+    def controllerTick(self):
+
+        # an event left behind by wakeController() is dropped
+        if self.frameCount < self.controllerDue:
+            return None
+        delay = self.controller.tick()
+        self.controllerDue = self.frameCount + int(round(delay * FPS))
+        return delay
+
+    def wakeController(self):
+
+        # tick the signal controller now instead of at its next second
+        if self.controllerDue != self.frameCount:
+            self.controllerDue = self.frameCount
+            heapq.heappush(self.events, (self.frameCount, 1, self.controllerTick))
+
+    def step(self):
+
+        # advance the simulated clock by one frame
+        events = self.events
+        while events and events[0][0] <= self.frameCount:
+            wake, order, task = heapq.heappop(events)
+            try:
+                delay = task()
+            except StopIteration:
+                delay = None
+            if delay is not None:
+                heapq.heappush(events, (self.frameCount + int(round(delay * FPS)), order, task))
+            if self.finished:
+                return
+
+        crossedNow = self.store.move_all(self.currentGreen, self.currentYellow, movingGap)
+        if crossedNow is not vehicle_store.noCrossings:
+            for i in range(noOfSignals):
+                self.vehicles[directionNumbers[i]]['crossed'] += int(crossedNow[i])
+            for vehicle in self.priorityVehicles:
+                if vehicle.crossed:
+                    self.priorityVehicles.leave(vehicle)
+        self.metrics.phase(self.currentGreen, self.frameCount, crossedNow)
+
+        self.frameCount += 1
+
+    def run(self, duration=None):
+
+        # run the current episode to its end headless and return the counts
+        if duration is not None:
+            self.simTime = duration
+        while not self.finished:
+            self.step()
+        return self.results()
+
+    def results(self):
+
+        # waits are seconds held before the stop line, averaged over every
+        # vehicle spawned, crossed or still queued
+        crossed = {directionNumbers[i]: self.vehicles[directionNumbers[i]]['crossed'] for i in range(noOfSignals)}
+        averageWait, priorityWait = self.metrics.waits(self.store)
+        return {'crossed': crossed, 'total': sum(crossed.values()), 'timeElapsed': self.timeElapsed,
+                'averageWait': averageWait, 'priorityWait': priorityWait}
+
+    def metricsSummary(self):
+        # percentiles of stopped time, queue delay and time to cross per
+        # direction, priority vehicle delay and throughput per phase
+        return self.metrics.summary(self.store, self.frameCount)
+
+    def queueCounts(self, direction):
+        # vehicles of each class waiting on direction, in vehicleClasses order;
+        # from the feed if it has a lane of direction, else from the roads
+        if self.countFeed is not None:
+            counts = self.countFeed.counts(direction)
+            if counts is not None:
+                self.feedMissing.discard(direction)
+                return counts
+            if direction not in self.feedMissing:
+                self.feedMissing.add(direction)
+                self.logger.warning(f"Detector feed {self.countFeed.path} has no {directionNumbers[direction]} lane,"
+                                    " timing it from the simulated queue")
+        return [int(count) for count in self.store.queued[direction]]
+
+    def setTime(self):
+
+        # vehicles of each class still before the stop line of nextGreen
+        noOfCars, noOfBuses, noOfTrucks, noOfRickshaws, noOfBikes, noOfAmbulances, noOffireTrucks = \
+            self.queueCounts(self.nextGreen)
+        noOfPoliceCars = 0
+
+        greenTime = math.ceil(((noOfCars*self.carTime) + (noOfRickshaws*self.rickshawTime) + (noOfBuses*self.busTime) + (noOfTrucks*self.truckTime) + (
+            noOfBikes*self.bikeTime) + (noOfAmbulances*self.ambulanceTime) + (noOffireTrucks*self.fireTruckTime) + (noOfPoliceCars*self.policeCarTime))/(self.noOfLanes+1))
+
+        self.log('Green Time: ', greenTime)
+        if(greenTime < self.defaultMinimum):
+            greenTime = self.defaultMinimum
+        elif(greenTime > self.defaultMaximum):
+            greenTime = self.defaultMaximum
+
+        signals = self.signals
+        signals[(self.nextGreen) % (noOfSignals)].green = greenTime
+        buffer = self.defaultMaximum - greenTime
+
+        signals[(self.nextGreen + 1) % (noOfSignals)].red -= buffer
+        signals[(self.nextGreen + 2) % (noOfSignals)].red -= buffer
+
+    def skipTimer(self):
+
+        # if green of current is greater than 10 then definitely red of next will be greater than 15
+        while True:
+
+            if(self.Emergency == False and self.signals[self.currentGreen].green > 10):
+
+                direction = directionNumbers[self.currentGreen]
+
+                self.displaySkip = False
+                skip = True
+                if(self.store.queued[self.currentGreen].sum() == 0):
+                    self.printStatus()
+                    self.controller.skip()
+                    self.log("skipping time due to no vehicle")
+
+                else:
+                    # no vehicle on the screen within firstStep of the stop line
+                    skip = not self.store.queuedPast(self.currentGreen, firstStep[direction], screenWidth, screenHeight)
+
+                    if skip:
+                        self.printStatus()
+                        self.controller.skip()
+
+                self.displaySkip = skip
+                yield 1
+                self.displaySkip = False
+            yield 5
+
+    def retireVehicles(self):
+
+        # once a second, take the vehicles that have left the screen off the
+        # roads and give their store rows back for new vehicles
+        while True:
+            for row in self.store.exitedRows(screenWidth, screenHeight):
+                self.retire(self.simulation[row])
+            yield 1
+
+    def retire(self, vehicle):
+
+        self.metrics.retire(self.store, vehicle.row)
+
+        for listener in self.retireListeners:
+            listener(vehicle)
+
+        # keep every index equal to the vehicle's position in its lane
+        lane = self.vehicles[vehicle.direction][vehicle.lane]
+        del lane[vehicle.index]
+        for i in range(vehicle.index, len(lane)):
+            lane[i].index = i
+
+        del self.simulation[vehicle.row]
+        self.store.release(vehicle.row)
+        vehicle.row = None
+
+    def resetStops(self, direction):
+
+        # for all the lanes with current yellow signal
+        for i in range(0, roadLanes):
+            self.stops[direction][i] = defaultStop[direction]
+            for vehicle in self.vehicles[direction][i]:
+                vehicle.stop = defaultStop[direction]
+
+    # Print the signal timers on cmd
+    def printStatus(self):
+
+        signals = self.signals
+        self.trace.record(self.timeElapsed, self.currentGreen, self.currentYellow, signals)
+        if not self.logger.isEnabledFor(simlog.DEBUG):
+            return
+        debug = self.logger.debug
+        for i in range(0, noOfSignals):
+            if(i == self.currentGreen):
+                if(self.currentYellow == 0):
+                    debug(" GREEN TS", i+1, "-> r:",
+                          signals[i].red, " y:", signals[i].yellow, " g:", signals[i].green)
+                else:
+                    debug("YELLOW TS", i+1, "-> r:",
+                          signals[i].red, " y:", signals[i].yellow, " g:", signals[i].green)
+            else:
+                debug("   RED TS", i+1, "-> r:",
+                      signals[i].red, " y:", signals[i].yellow, " g:", signals[i].green)
+        debug()
+
+    # Update values of the signal timers after every second
+    def updateValues(self):
+
+        signals = self.signals
+        for i in range(0, noOfSignals):
+            if(i == self.currentGreen):
+                if not self.currentYellow:
+                    signals[i].green -= 1
+                    signals[i].totalGreenTime += 1
+                else:
+                    signals[i].yellow -= 1
+            else:
+                signals[i].red -= 1
+
+    def calculatetrustDynamic(self):
+
+        congestion = self.congestion
+        for i in range(0, noOfSignals):
+            vehicleOnOneSide = int(self.store.queued[i].sum())
+
+            # trust score defined per 100 vehicles
+            val = math.exp(-0.03 * vehicleOnOneSide)
+            congestion[i].hotspot_score = round(val*self.weightage, 2)
+            congestion[i].trust_dynamic = round(congestion[i].congestion_score + congestion[i].weather_score + congestion[i].hotspot_score, 2)
+
+            if self.hotspot_region:
+                congestion[i].trust_dynamic = round(congestion[i].trust_dynamic*self.weightage, 2)
+
+    def directionNumberFromDistribution(self):
+
+        if len(self.traffic_distribution) == 0:
+            self.distribution = [250, 500, 750, 1000]
+        else:
+            self.distribution = self.traffic_distribution
+        distribution = self.distribution
+
+        # deciding the direction_number from
+        # a range of values from 1 to 1000
+        temp = self.rng.randint(0, 999)
+        direction_number = 0
+        self.calculatetrustDynamic()
+        if(temp < distribution[0]):
+            direction_number = 0
+        elif(temp < distribution[1]):
+            direction_number = 1
+        elif(temp < distribution[2]):
+            direction_number = 2
+        elif(temp < distribution[3]):
+            direction_number = 3
+
+        return direction_number
+
+    def directionNumberFromtrustDynamicScores(self):
+
+        self.calculatetrustDynamic()
+        trustDynamic = []
+        for i in range(0, noOfSignals):
+            trustDynamic.append(self.congestion[i].trust_dynamic)
+
+        max_item = max(trustDynamic)
+        return trustDynamic.index(max_item)
+
+    def simulationTime(self):
+
+        while(True):
+
+            yield 1
+            self.timeElapsed += 1
+            for listener in self.tickListeners:
+                listener(self)
+            if(self.timeElapsed == self.simTime):
+                totalVehicles = 0
+                self.log('Lane-wise Vehicle Counts')
+                for i in range(noOfSignals):
+                    self.log('Lane', i+1, ':',
+                             self.vehicles[directionNumbers[i]]['crossed'])
+                    totalVehicles += self.vehicles[directionNumbers[i]]['crossed']
+
+                self.log('Total vehicles passed: ', totalVehicles)
+                self.log('Total time passed: ', self.timeElapsed)
+                self.logger.close()
+                self.finished = True
+                return
+
+    def generateVehicles(self):
+
+        rng = self.rng
+        spawned = 0
+        while(True):
+
+            spawned += 1
+            if self.priorityInterval and spawned % self.priorityInterval == 0:
+                self.priority_vehicle_flag = True
+
+            vehicle_type = rng.randint(0, 6)
+
+            if(vehicle_type == 5 or vehicle_type == 6):
+                vehicle_type = rng.randint(0, 4)
+
+            if self.priority_vehicle_flag:
+                vehicle_type = 5
+
+            self.priority_vehicle_flag = False
+
+            lane_number = rng.randint(0, 2)
+
+            will_turn = 0
+
+            # deciding whether the vehicle will turn or not
+            if(lane_number == 2 or lane_number == 0):
+                temp = rng.randint(0, 5)
+                if(temp < 3):
+                    will_turn = 1
+                elif(temp < 6):
+                    will_turn = 0
+
+            # using the fixed distribution to distribute vehicles in simulation
+            direction_number = self.directionNumberFromDistribution()
+
+            self.spawn(vehicle_type, lane_number, direction_number, will_turn, (vehicle_type == 5 or vehicle_type == 6))
+
+            yield 1
+
+    def replayVehicles(self):
+
+        # the recorded spawns of self.replay, each on the frame it was recorded on
+        for frame, vehicle_type, lane_number, direction_number, will_turn, active in self.replay:
+            if frame > self.frameCount:
+                yield (frame - self.frameCount) / FPS
+            # trust scores are refreshed on every spawn, as when generating
+            self.calculatetrustDynamic()
+            self.spawn(vehicle_type, lane_number, direction_number, will_turn, active)
+
+    def spawn(self, vehicle_type, lane_number, direction_number, will_turn, active):
+        if self.spawnLog is not None:
+            self.spawnLog.append(self.frameCount, vehicle_type, lane_number, direction_number, will_turn, active)
+        return Vehicle(self, lane_number, vehicleTypes[vehicle_type], direction_number,
+                       directionNumbers[direction_number], will_turn, active)
+
+    def distanceTimeAssignment(self):
+
+        # time assignment for 20m as 10sec, 40m as 15sec and for longer distances using yolo
+        signals = self.signals
+        stops = self.stops
+        direction = directionNumbers[self.nextGreen]
+        if(direction == 'right' or direction == 'down'):
+
+            if(firstStep[direction] < stops[direction][0] and firstStep[direction] < stops[direction][1] and firstStep[direction] < stops[direction][2]):
+                signals[self.nextGreen].green = self.defaultMinimum
+                self.log("less than 20m")
+
+            elif(secondStep[direction] < stops[direction][0] and secondStep[direction] < stops[direction][1] and secondStep[direction] < stops[direction][2]):
+                signals[self.nextGreen].green = self.defaultMinimum + 5
+                self.log("less than 40m")
+
+            else:
+                self.setTime()
+                self.log("using yolo")
+
+        elif(direction == 'left' or direction == 'up'):
+
+            if(firstStep[direction] > stops[direction][0] and firstStep[direction] > stops[direction][1] and firstStep[direction] > stops[direction][2]):
+                signals[self.nextGreen].green = self.defaultMinimum
+                self.log("less than 20m")
+
+            elif(secondStep[direction] > stops[direction][0] and secondStep[direction] > stops[direction][1] and secondStep[direction] > stops[direction][2]):
+                signals[self.nextGreen].green = self.defaultMinimum + 5
+                self.log("less than 40m")
+
+            else:
+                self.setTime()
+                self.log("using yolo")
@@ -0,0 +1,196 @@
+
+# coding: utf-8
+
+'''
+Per-vehicle delay metrics and per-phase throughput for engine.py.
+
+The vehicle store records what is needed while it moves the vehicles: the
+frames a vehicle stood still before its stop line (`waited`), the frame it
+was spawned on and the frame it crossed, and how many frames it would have
+needed to reach the stop line at full speed (`freeFlow`). From those:
+    stopped time    frames held before the stop line
+    time to cross   spawn to crossing the stop line
+    queue delay     time to cross beyond the free-flow time
+RunMetrics folds every vehicle retired from the store into running
+aggregates per direction and priority flag: a count, a sum for the mean and
+a histogram of whole frames for the percentiles. Its memory so depends on
+the longest time seen, not on how many vehicles went through. summary()
+adds the vehicles still on the roads and reports per direction
+percentiles, the same for priority vehicles, and the vehicles each signal
+let through per phase (one green plus yellow of that signal).
+
+Stopped time and time to cross are whole frames, so their percentiles are
+exact; queue delay goes into the histogram to the nearest frame (1/FPS s),
+its mean is exact.
+
+All times are reported in seconds.
+'''
+
+import numpy as np
+
+
+percentiles = (50, 95, 99)
+figures = ('stopped', 'timeToCross', 'delay')
+
+
+class Aggregate:
+
+    # count, sum and histogram of whole frames of one figure; the histogram
+    # grows to the largest value added
+    def __init__(self, bins=64):
+        self.count = 0
+        self.total = 0.0
+        self.histogram = np.zeros(bins, dtype=np.int32)
+
+    def grow(self, top):
+        histogram = np.zeros(1 << int(top).bit_length(), dtype=np.int32)
+        histogram[:len(self.histogram)] = self.histogram
+        self.histogram = histogram
+
+    def add(self, frames):
+        self.count += 1
+        self.total += frames
+        bin = int(round(frames))
+        if bin >= len(self.histogram):
+            self.grow(bin)
+        self.histogram[bin] += 1
+
+    def merged(self, frames):
+        # a copy with an array of values added
+        result = Aggregate(len(self.histogram))
+        result.count = self.count + len(frames)
+        result.total = self.total + float(np.sum(frames))
+        result.histogram[:] = self.histogram
+        if len(frames):
+            bins = np.rint(frames).astype(np.int64)
+            if bins.max() >= len(result.histogram):
+                result.grow(bins.max())
+            result.histogram += np.bincount(bins, minlength=len(result.histogram)).astype(np.int32)
+        return result
+
+
+def combined(aggregates):
+    # one Aggregate of several
+    result = Aggregate(max(len(aggregate.histogram) for aggregate in aggregates))
+    for aggregate in aggregates:
+        result.count += aggregate.count
+        result.total += aggregate.total
+        result.histogram[:len(aggregate.histogram)] += aggregate.histogram
+    return result
+
+
+def describe(aggregate, fps):
+    # count, mean and percentiles in seconds, None for the figures of an
+    # empty aggregate; the percentiles interpolate linearly between the
+    # sorted values, as np.percentile does
+    count = aggregate.count
+    if not count:
+        return {'count': 0, 'mean': None, **{f'p{q}': None for q in percentiles}}
+    cumulative = np.cumsum(aggregate.histogram)
+    points = {}
+    for q in percentiles:
+        position = (count - 1) * q / 100
+        low = int(position)
+        lowValue, highValue = np.searchsorted(cumulative, [low, min(low + 1, count - 1)], side='right')
+        points[f'p{q}'] = round(float(lowValue + (position - low) * (highValue - lowValue)) / fps, 3)
+    return {'count': count, 'mean': round(aggregate.total / count / fps, 3), **points}
+
+
+class RunMetrics:
+
+    def __init__(self, fps, directionNames):
+        self.fps = fps
+        self.directionNames = directionNames    # direction number -> name
+        # figure -> one Aggregate per group (direction * 2 + priority flag)
+        # of the retired vehicles; time to cross and queue delay only count
+        # vehicles that crossed
+        self.groups = {figure: [Aggregate() for _ in range(2 * len(directionNames))] for figure in figures}
+        # one tuple per finished phase: (signal, startFrame, endFrame, crossed)
+        self.phases = []
+        self.phaseSignal = None
+        self.phaseStart = 0
+        self.phaseCrossed = 0
+
+    def retire(self, store, row):
+        group = int(store.direction[row]) * 2 + int(store.active[row])
+        self.groups['stopped'][group].add(int(store.waited[row]))
+        crossFrame = int(store.crossFrame[row])
+        if crossFrame >= 0:
+            frames = crossFrame - int(store.spawnFrame[row])
+            self.groups['timeToCross'][group].add(frames)
+            self.groups['delay'][group].add(max(frames - float(store.freeFlow[row]), 0))
+
+    def phase(self, signal, frame, crossedNow=None):
+
+        # called every frame with the green signal and the vehicles that
+        # crossed per direction; a new signal closes the phase before it
+        if signal != self.phaseSignal:
+            if self.phaseSignal is not None:
+                self.phases.append((self.phaseSignal, self.phaseStart, frame, self.phaseCrossed))
+            self.phaseSignal = signal
+            self.phaseStart = frame
+            self.phaseCrossed = 0
+        if crossedNow is not None:
+            self.phaseCrossed += int(crossedNow[signal])
+
+    def aggregates(self, store):
+
+        # the aggregates of the retired vehicles with those still on the
+        # roads added, figure -> one Aggregate per group
+        n = store.count
+        alive = store.alive[:n]
+        group = store.direction[:n][alive] * 2 + store.active[:n][alive]
+        crossFrame = store.crossFrame[:n][alive]
+        crossed = crossFrame >= 0
+        frames = (crossFrame - store.spawnFrame[:n][alive])[crossed]
+        values = {'stopped': (group, store.waited[:n][alive]),
+                  'timeToCross': (group[crossed], frames),
+                  'delay': (group[crossed], np.maximum(frames - store.freeFlow[:n][alive][crossed], 0))}
+        return {figure: [aggregate.merged(values[figure][1][values[figure][0] == i])
+                         for i, aggregate in enumerate(self.groups[figure])]
+                for figure in figures}
+
+    def waits(self, store):
+        # mean stopped time in seconds of every vehicle, and of the priority
+        # vehicles (None without any)
+        stopped = self.aggregates(store)['stopped']
+        every = combined(stopped)
+        priority = combined(stopped[1::2])
+        return (every.total / every.count / self.fps if every.count else 0.0,
+                priority.total / priority.count / self.fps if priority.count else None)
+
+    def summary(self, store, frame):
+
+        aggregates = self.aggregates(store)
+        phases = self.phases + ([(self.phaseSignal, self.phaseStart, frame, self.phaseCrossed)]
+                                if self.phaseSignal is not None and frame > self.phaseStart else [])
+
+        def figure(name, groups):
+            return describe(combined([aggregates[name][group] for group in groups]), self.fps)
+
+        perDirection = {}
+        for i, name in self.directionNames.items():
+            ownPhases = [(end - start, count) for signal, start, end, count in phases if signal == i]
+            greenSeconds = sum(length for length, count in ownPhases) / self.fps
+            served = sum(count for length, count in ownPhases)
+            perDirection[name] = {
+                'stopped': figure('stopped', (2 * i, 2 * i + 1)),
+                'timeToCross': figure('timeToCross', (2 * i, 2 * i + 1)),
+                'queueDelay': figure('delay', (2 * i, 2 * i + 1)),
+                'phases': len(ownPhases),
+                'vehiclesPerPhase': round(served / len(ownPhases), 3) if ownPhases else None,
+                'vehiclesPerMinute': round(served * 60 / greenSeconds, 3) if greenSeconds else None,
+            }
+
+        every = range(2 * len(self.directionNames))
+        priority = every[1::2]
+        return {
+            'directions': perDirection,
+            'stopped': figure('stopped', every),
+            'queueDelay': figure('delay', every),
+            'priorityStopped': figure('stopped', priority),
+            'priorityDelay': figure('delay', priority),
+            'phases': [{'signal': self.directionNames[signal], 'start': start / self.fps,
+                        'seconds': (end - start) / self.fps, 'crossed': count}
+                       for signal, start, end, count in phases],
+        }
@@ -0,0 +1,46 @@
+
+# coding: utf-8
+
+'''
+Registry of the active priority vehicles (ambulances, fire trucks) that have
+not crossed their stop line yet.
+
+A vehicle joins when it is spawned and leaves when it crosses, and every
+listener is called right away as listener(event, vehicle) with event 'join'
+or 'leave'. The signal controller listens, so preemption starts on the
+spawn itself rather than after a scan of every lane, and ends as soon as
+the vehicle is through. Vehicles are kept in spawn order, which is the order
+they are served in when several are on the roads at once.
+'''
+
+
+class PriorityRegistry:
+
+    def __init__(self):
+        self.vehicles = {}    # store row -> Vehicle, in spawn order
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.vehicles)
+
+    def __iter__(self):
+        return iter(list(self.vehicles.values()))
+
+    def __contains__(self, vehicle):
+        return vehicle.row in self.vehicles
+
+    def first(self):
+        # the vehicle to serve next, or None
+        return next(iter(self.vehicles.values()), None)
+
+    def join(self, vehicle):
+        self.vehicles[vehicle.row] = vehicle
+        self.notify('join', vehicle)
+
+    def leave(self, vehicle):
+        if self.vehicles.pop(vehicle.row, None) is not None:
+            self.notify('leave', vehicle)
+
+    def notify(self, event, vehicle):
+        for listener in self.listeners:
+            listener(event, vehicle)
@@ -0,0 +1,187 @@
+
+# coding: utf-8
+
+'''
+Dirty-rectangle drawing for the pygame front-end.
+
+The background is drawn once. After that, every frame DirtyRenderer.draw()
+compares each overlay (signal image, text label, checkbox) and each sprite
+with what it drew the frame before. Only the rectangles of the ones that
+moved or changed, old and new position, are repainted (background, then
+overlays, then sprites, clipped to the rectangle), and only those
+rectangles are passed to pygame.display.update().
+
+An overlay is anything with a `bounds` Rect, a state() that changes whenever
+its drawing does, and draw(screen). Label keeps its rendered text until the
+text or colours change, and takes new text from textCache, an LRU cache of
+rendered strings shared by every label, so a timer counting through the
+same values renders each of them once.
+'''
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+
+    # rendered text surfaces keyed by (font, text, colour, background),
+    # least recently used evicted first
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, colour, background=None):
+        key = (id(font), text, colour, background)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, colour, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.surfaces), 'hitRate': round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+textCache = TextCache()
+
+
+class Label:
+
+    def __init__(self, font, pos, cache=textCache):
+        self.font = font
+        self.pos = pos
+        self.cache = cache
+        self.key = None
+        self.surface = None
+        self.bounds = pygame.Rect(pos, (0, 0))
+
+    def set(self, text, colour, background=None):
+        key = (text, colour, background)
+        if key != self.key:
+            self.key = key
+            self.surface = self.cache.render(self.font, text, colour, background)
+            self.bounds = self.surface.get_rect(topleft=self.pos)
+
+    def state(self):
+        return self.key
+
+    def draw(self, screen):
+        if self.surface is not None:
+            screen.blit(self.surface, self.bounds)
+
+
+class Picture:
+
+    # a surface at a fixed position, e.g. a signal light
+    def __init__(self, pos):
+        self.pos = pos
+        self.surface = None
+        self.bounds = pygame.Rect(pos, (0, 0))
+
+    def set(self, surface):
+        if surface is not self.surface:
+            self.surface = surface
+            self.bounds = surface.get_rect(topleft=self.pos)
+
+    def state(self):
+        return id(self.surface)
+
+    def draw(self, screen):
+        if self.surface is not None:
+            screen.blit(self.surface, self.bounds)
+
+
+class DirtyRenderer:
+
+    # above this many changed rectangles one full redraw is cheaper
+    maxDirtyRects = 150
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.overlays = []
+        self.overlayStates = []
+        self.spriteStates = {}    # sprite -> (rect, image) as last drawn
+        self.fullRedraw = True
+
+    def add(self, overlay):
+        self.overlays.append(overlay)
+        self.overlayStates.append(None)
+
+    def invalidate(self):
+        # e.g. after the window was resized or exposed
+        self.fullRedraw = True
+
+    def draw(self, sprites):
+
+        # sprites: objects with `image` and `rect`, drawn over the overlays;
+        # returns the rectangles passed to display.update()
+        screen = self.screen
+        dirty = []
+
+        for i, overlay in enumerate(self.overlays):
+            state = (pygame.Rect(overlay.bounds), overlay.state())
+            if state != self.overlayStates[i]:
+                if self.overlayStates[i] is not None:
+                    dirty.append(self.overlayStates[i][0])
+                dirty.append(state[0])
+                self.overlayStates[i] = state
+
+        spriteStates = {}
+        for sprite in sprites:
+            state = (pygame.Rect(sprite.rect), sprite.image)
+            old = self.spriteStates.pop(sprite, None)
+            if old is None or old[0] != state[0] or old[1] is not state[1]:
+                if old is not None:
+                    dirty.append(old[0])
+                dirty.append(state[0])
+            spriteStates[sprite] = state
+        # sprites no longer drawn leave their last rectangle behind
+        dirty.extend(rect for rect, image in self.spriteStates.values())
+        self.spriteStates = spriteStates
+
+        screenRect = screen.get_rect()
+        dirty = [rect.clip(screenRect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+
+        if self.fullRedraw or len(dirty) > self.maxDirtyRects:
+            self.fullRedraw = False
+            screen.blit(self.background, (0, 0))
+            for overlay in self.overlays:
+                overlay.draw(screen)
+            for rect, image in spriteStates.values():
+                screen.blit(image, rect)
+            pygame.display.update()
+            return [screenRect]
+
+        if not dirty:
+            return dirty
+
+        overlayRects = [state[0] for state in self.overlayStates]
+        drawn = list(spriteStates.values())
+        spriteRects = [rect for rect, image in drawn]
+        for rect in dirty:
+            screen.set_clip(rect)
+            screen.blit(self.background, rect, rect)
+            for i in rect.collidelistall(overlayRects):
+                self.overlays[i].draw(screen)
+            for i in rect.collidelistall(spriteRects):
+                screen.blit(drawn[i][1], drawn[i][0])
+        screen.set_clip(None)
+
+        pygame.display.update(dirty)
+        return dirty
@@ -0,0 +1,156 @@
+
+# coding: utf-8
+
+'''
+Columnar run logs for engine.py episodes.
+
+A RunLogger buffers one row per simulated second of signal state (timers,
+current green, controller state, queues and crossings per direction) and one
+summary row per run, column by column in memory, and writes them in batches
+of `batchRows` rows. Each table is partitioned by run id:
+    <root>/ticks/run=<runId>/part-00000.parquet
+    <root>/summaries/run=<runId>/part-00000.parquet
+so runs written by parallel sweep workers never share a file. Run ids from
+newRunId() are unique across invocations, and a RunLogger refuses to write
+into a partition it did not create, so a second sweep into the same root
+can never overwrite or mix with the first. With pyarrow
+installed the parts are Parquet files with the schemas below; without it
+they are compressed NumPy .npz files holding the same typed columns.
+load() reads every part of a table, of either kind, into one pandas
+DataFrame with the run id as a column.
+'''
+
+import glob
+import json
+import math
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+import engine
+
+
+directionNames = [engine.directionNumbers[i] for i in range(engine.noOfSignals)]
+
+# column name -> NumPy dtype; the run id is the partition, not a column
+tickSchema = {'time': np.int32, 'currentGreen': np.int8, 'currentYellow': np.int8, 'state': str}
+for direction in directionNames:
+    for field in ('Red', 'Yellow', 'Green', 'Queued', 'Crossed'):
+        tickSchema[direction + field] = np.int32
+
+summarySchema = {'seed': np.int64, 'params': str, 'scenario': str, 'timeElapsed': np.int32, 'total': np.int32,
+                 'averageWait': np.float64, 'priorityWait': np.float64}
+for direction in directionNames:
+    summarySchema[direction] = np.int32
+    summarySchema[direction + 'StoppedP95'] = np.float64
+    summarySchema[direction + 'VehiclesPerPhase'] = np.float64
+
+tables = {'ticks': tickSchema, 'summaries': summarySchema}
+
+
+def newRunId():
+    # start time plus a random suffix, so ids sort by time and never repeat
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:8]
+
+
+class RunLogger:
+
+    def __init__(self, root, runId, batchRows=4096):
+        self.root = root
+        self.runId = str(runId)
+        self.batchRows = batchRows
+        self.columns = {table: {name: [] for name in schema} for table, schema in tables.items()}
+        self.parts = {table: 0 for table in tables}
+
+    def attach(self, sim):
+        # log sim's signal state every simulated second from now on
+        sim.tickListeners.append(self.tick)
+
+    def append(self, table, row):
+        columns = self.columns[table]
+        for name in columns:
+            columns[name].append(row[name])
+        if len(next(iter(columns.values()))) >= self.batchRows:
+            self.flush(table)
+
+    def tick(self, sim):
+        row = {'time': sim.timeElapsed, 'currentGreen': sim.currentGreen, 'currentYellow': sim.currentYellow,
+               'state': sim.controller.state}
+        queued = sim.store.queued.sum(axis=1)
+        for i, direction in enumerate(directionNames):
+            signal = sim.signals[i]
+            row[direction + 'Red'] = signal.red
+            row[direction + 'Yellow'] = signal.yellow
+            row[direction + 'Green'] = signal.green
+            row[direction + 'Queued'] = queued[i]
+            row[direction + 'Crossed'] = sim.vehicles[direction]['crossed']
+        self.append('ticks', row)
+
+    def summary(self, sim, result, seed=None, params=None, scenario=''):
+        # one row per run; result is what sim.run() returned
+        figures = sim.metricsSummary()['directions']
+        row = {'seed': -1 if seed is None else seed, 'params': json.dumps(params or {}, sort_keys=True),
+               'scenario': scenario or '', 'timeElapsed': result['timeElapsed'], 'total': result['total'],
+               'averageWait': result['averageWait'],
+               'priorityWait': math.nan if result['priorityWait'] is None else result['priorityWait']}
+        for direction in directionNames:
+            row[direction] = result['crossed'][direction]
+            stopped = figures[direction]['stopped']['p95']
+            perPhase = figures[direction]['vehiclesPerPhase']
+            row[direction + 'StoppedP95'] = math.nan if stopped is None else stopped
+            row[direction + 'VehiclesPerPhase'] = math.nan if perPhase is None else perPhase
+        self.append('summaries', row)
+
+    def flush(self, table=None):
+
+        # write the buffered rows of one table, or of all, as one part each
+        for name in ([table] if table else tables):
+            columns = self.columns[name]
+            if not next(iter(columns.values())):
+                continue
+            arrays = {column: np.asarray(values, dtype=tables[name][column])
+                      for column, values in columns.items()}
+            directory = os.path.join(self.root, name, f'run={self.runId}')
+            if self.parts[name] == 0 and os.path.exists(directory):
+                raise FileExistsError(f"run log partition {directory} already exists")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'part-{self.parts[name]:05d}')
+            if pa is not None:
+                pq.write_table(pa.table(arrays), path + '.parquet')
+            else:
+                np.savez_compressed(path + '.npz', **arrays)
+            self.parts[name] += 1
+            for values in columns.values():
+                values.clear()
+
+    def close(self):
+        self.flush()
+
+
+def load(root, table='summaries'):
+
+    # every part of a table under root, Parquet or .npz, as one DataFrame
+    frames = []
+    for path in sorted(glob.glob(os.path.join(root, table, 'run=*', 'part-*'))):
+        runId = os.path.basename(os.path.dirname(path))[len('run='):]
+        if path.endswith('.parquet'):
+            if pa is None:
+                raise ImportError(f"pyarrow is needed to read {path}")
+            frame = pq.read_table(path).to_pandas()
+        else:
+            with np.load(path) as parts:
+                frame = pd.DataFrame({column: parts[column] for column in parts.files})
+        frame.insert(0, 'runId', runId)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=['runId'] + list(tables[table]))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,87 @@
+
+# coding: utf-8
+
+'''
+Recorded vehicle spawn streams for engine.py.
+
+Every Simulation writes the vehicles it spawns to a Scenario, and a
+Simulation given a Scenario spawns exactly those vehicles at the same frames
+instead of drawing them from its RNG. A stream captured once can so be
+replayed against different signal timing settings, and every run sees the
+same traffic.
+
+On disk a scenario is a 12 byte header (magic, format version, number of
+spawns) followed by one 8 byte record per spawn:
+    frame        uint32   engine frame the vehicle was spawned on
+    vehicleType  uint8    key of engine.vehicleTypes
+    lane         uint8
+    direction    uint8    key of engine.directionNumbers
+    flags        uint8    1 = will turn, 2 = priority vehicle
+all little-endian, so a 400 s episode of about 400 vehicles takes 3 kB.
+'''
+
+import struct
+
+
+MAGIC = b'TSCN'
+VERSION = 1
+header = struct.Struct('<4sHxxI')
+record = struct.Struct('<IBBBB')
+
+WILL_TURN = 1
+ACTIVE = 2
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+class Scenario:
+
+    def __init__(self, spawns=None):
+        # spawns: (frame, vehicleType, lane, direction, willTurn, active) tuples in frame order
+        self.spawns = list(spawns or [])
+
+    def __len__(self):
+        return len(self.spawns)
+
+    def __iter__(self):
+        return iter(self.spawns)
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and self.spawns == other.spawns
+
+    def append(self, frame, vehicleType, lane, direction, willTurn, active):
+        self.spawns.append((frame, vehicleType, lane, direction, int(bool(willTurn)), bool(active)))
+
+    def toBytes(self):
+        parts = [header.pack(MAGIC, VERSION, len(self.spawns))]
+        for frame, vehicleType, lane, direction, willTurn, active in self.spawns:
+            flags = (WILL_TURN if willTurn else 0) | (ACTIVE if active else 0)
+            parts.append(record.pack(frame, vehicleType, lane, direction, flags))
+        return b''.join(parts)
+
+    @classmethod
+    def fromBytes(cls, data):
+        if len(data) < header.size:
+            raise ScenarioError("scenario file is too short")
+        magic, version, count = header.unpack_from(data)
+        if magic != MAGIC:
+            raise ScenarioError("not a scenario file")
+        if version != VERSION:
+            raise ScenarioError(f"unsupported scenario version {version}")
+        if len(data) != header.size + count * record.size:
+            raise ScenarioError(f"scenario file should hold {count} spawns")
+        spawns = []
+        for frame, vehicleType, lane, direction, flags in record.iter_unpack(data[header.size:]):
+            spawns.append((frame, vehicleType, lane, direction, int(bool(flags & WILL_TURN)), bool(flags & ACTIVE)))
+        return cls(spawns)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.toBytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.fromBytes(file.read())
@@ -0,0 +1,324 @@
+
+# coding: utf-8
+
+'''
+Finite-state signal controller for engine.py.
+
+The signal cycle (green -> yellow -> next signal green) and the priority
+vehicle preemption that used to be the recursive repeat() and
+HandlePriorityVehicleThroughGPS() are explicit states here. tick() is
+called by the engine's event queue once per simulated second and runs state
+handlers until one of them waits for the next second, so the controller
+holds the same few fields however long the run is. priorityEvent() is the
+priority registry's hook: a priority vehicle joining, or the held one
+crossing, wakes the controller at once.
+
+Every state change is appended to `transitions` as
+(timeElapsed, fromState, toState, currentGreen, event), a bounded history,
+and counted in `transitionCounts`.
+'''
+
+from collections import deque
+
+
+GREEN = 'green'
+YELLOW = 'yellow'
+# current phase cut short so the priority vehicle's signal can turn green
+PRIORITY_CLEAR_GREEN = 'priorityClearGreen'
+PRIORITY_CLEAR_YELLOW = 'priorityClearYellow'
+# green held while the priority vehicle is short of the stop line
+PRIORITY_HOLD = 'priorityHold'
+# a signal turned green out of turn finishing before the cycle resumes
+PRIORITY_RELEASE_GREEN = 'priorityReleaseGreen'
+PRIORITY_RELEASE_YELLOW = 'priorityReleaseYellow'
+
+
+class SignalController:
+
+    def __init__(self, sim, historySize=100):
+        # sim: the simulation whose signals, timers and vehicles are driven
+        self.sim = sim
+        self.state = GREEN
+        self.transitions = deque(maxlen=historySize)
+        self.transitionCounts = {}
+
+        self.detectionPending = False   # a green second passed, check detectionTime
+        self.priorityVehicle = None
+        self.prioritySignal = None      # signal held green for the priority vehicle
+        self.waitingSignal = None       # red signal counted down while the phase is cleared
+        self.releaseAfterHold = False   # the held signal was turned green out of turn
+
+        self.handlers = {
+            GREEN: self.onGreen,
+            YELLOW: self.onYellow,
+            PRIORITY_CLEAR_GREEN: self.onClearGreen,
+            PRIORITY_CLEAR_YELLOW: self.onClearYellow,
+            PRIORITY_HOLD: self.onHold,
+            PRIORITY_RELEASE_GREEN: self.onReleaseGreen,
+            PRIORITY_RELEASE_YELLOW: self.onReleaseYellow,
+        }
+
+    def tick(self):
+        # one simulated second; handlers return the seconds to wait, or
+        # None after a transition that takes effect immediately
+        while True:
+            delay = self.handlers[self.state]()
+            if delay is not None:
+                return delay
+
+    def moveTo(self, state, event=None):
+        self.transitions.append((self.sim.timeElapsed, self.state, state, self.sim.currentGreen, event))
+        key = (self.state, state)
+        self.transitionCounts[key] = self.transitionCounts.get(key, 0) + 1
+        self.state = state
+
+    def emergencyPending(self):
+        return len(self.sim.priorityVehicles) > 0
+
+    def priorityEvent(self, event, vehicle):
+
+        # registry hook: start preempting as soon as a priority vehicle
+        # appears, and stop holding green as soon as the held one crosses
+        sim = self.sim
+        sim.Emergency = len(sim.priorityVehicles) > 0
+        if event == 'join':
+            sim.log("Handling Vehicle at -->", vehicle.direction_number)
+            if self.state in (GREEN, YELLOW):
+                sim.wakeController()
+        elif self.state == PRIORITY_HOLD and vehicle is self.priorityVehicle:
+            sim.wakeController()
+
+    def skip(self):
+
+        # cut the current green short when there is no vehicle left to serve
+        sim = self.sim
+        signals = sim.signals
+        buffer = signals[sim.nextGreen].red - \
+            (sim.defaultMinimum + sim.defaultYellow)
+        signals[sim.currentGreen].green -= buffer
+        signals[sim.nextGreen].red -= buffer
+        signals[(sim.nextGreen + 1) % (sim.noOfSignals)].red -= buffer
+        signals[(sim.nextGreen + 2) % (sim.noOfSignals)].red -= buffer
+        sim.log("skipping time of direction ==>",
+                sim.directionNumbers[sim.currentGreen])
+        self.moveTo(self.state, 'skip')
+
+    def onGreen(self):
+
+        sim = self.sim
+        signals = sim.signals
+
+        # set time of next green signal
+        if self.detectionPending:
+            self.detectionPending = False
+            if(signals[sim.nextGreen % sim.noOfSignals].red == sim.detectionTime):
+                sim.setTime()
+
+        if(signals[sim.currentGreen].green > 0):
+            if self.emergencyPending():
+                return self.startPriority(sim.priorityVehicles.first())
+            sim.printStatus()
+            sim.updateValues()
+            self.detectionPending = True
+            return 1
+
+        sim.currentYellow = 1   # set yellow signal on
+        sim.resetStops(sim.directionNumbers[sim.currentGreen])
+        self.moveTo(YELLOW)
+
+    def onYellow(self):
+
+        sim = self.sim
+        signals = sim.signals
+
+        # while the timer of current yellow signal is not zero
+        if(signals[sim.currentGreen].yellow > 0):
+            if self.emergencyPending():
+                return self.startPriority(sim.priorityVehicles.first())
+            sim.printStatus()
+            sim.updateValues()
+            return 1
+
+        sim.currentYellow = 0   # set yellow signal off
+
+        signals[sim.currentGreen].green = sim.defaultMaximum
+        signals[sim.currentGreen].yellow = sim.defaultYellow
+        signals[sim.currentGreen].red = sim.defaultRed
+
+        sim.currentGreen = sim.nextGreen  # set next signal as green signal
+        sim.nextGreen = (sim.currentGreen+1) % sim.noOfSignals    # set next green signal
+
+        # set the red time of next to next signal as (yellow time + green time) of next signal
+        temp = signals[sim.nextGreen].red
+        signals[sim.nextGreen].red = signals[sim.currentGreen].yellow + \
+            signals[sim.currentGreen].green
+
+        # checking if the current red timer exceeds the previous ongoing timer or not
+        if(signals[sim.nextGreen].red > temp):
+            sim.log("I will go crazy...!")
+
+        self.moveTo(GREEN, 'phase')
+
+    def startPriority(self, vehicle):
+
+        sim = self.sim
+        signals = sim.signals
+        sim.sirenOn = True
+        self.priorityVehicle = vehicle
+        self.releaseAfterHold = False
+
+        if(sim.currentGreen == vehicle.direction_number):
+
+            if(signals[sim.currentGreen].green == 0 and signals[sim.currentGreen].yellow > 0):
+                # PV at a yellow signal
+                sim.log(f"---------------------Handling at light Yellow {vehicle.direction_number}-----------------------")
+                sim.currentYellow = 0
+                signals[sim.currentGreen].yellow = sim.defaultYellow
+            else:
+                # PV at a green signal
+                sim.log(f"-------------------------Handling at light Green {vehicle.direction_number}--------------------------")
+            self.startHold(sim.currentGreen, 'priority')
+
+        elif(sim.nextGreen == vehicle.direction_number):
+
+            sim.log(f"-------------------------Handling at Next Green {vehicle.direction_number} -----------------------")
+            self.startClear(sim.nextGreen % sim.noOfSignals)
+
+        # PV at a red signal
+        else:
+
+            sim.log(f"-------------------------Handling at light Red {vehicle.direction_number} ---------------------------")
+            self.releaseAfterHold = True
+            self.startClear(vehicle.direction_number)
+
+    def startClear(self, waitingSignal):
+
+        # run out the green and yellow of currentGreen while counting down
+        # the red of the signal that takes over
+        sim = self.sim
+        signals = sim.signals
+        if(signals[sim.currentGreen].green > sim.defaultMinimum):
+            signals[sim.currentGreen].green = sim.defaultMinimum
+
+        self.waitingSignal = waitingSignal
+        signals[waitingSignal].red = signals[sim.currentGreen].green + signals[sim.currentGreen].yellow
+        self.moveTo(PRIORITY_CLEAR_GREEN, 'priority')
+
+    def onClearGreen(self):
+
+        sim = self.sim
+        signals = sim.signals
+        if(signals[sim.currentGreen].green > 0):
+            sim.printStatus()
+            signals[sim.currentGreen].green -= 1
+            signals[self.waitingSignal].red -= 1
+            return 1
+
+        sim.currentYellow = 1  # set yellow signal on
+        sim.resetStops(sim.directionNumbers[sim.currentGreen])
+        self.moveTo(PRIORITY_CLEAR_YELLOW)
+
+    def onClearYellow(self):
+
+        sim = self.sim
+        signals = sim.signals
+        if(signals[sim.currentGreen].yellow > 0):
+            sim.printStatus()
+            signals[sim.currentGreen].yellow -= 1
+            signals[self.waitingSignal].red -= 1
+            return 1
+
+        sim.currentYellow = 0   # set yellow signal off
+
+        signals[sim.currentGreen].green = sim.defaultMaximum
+        signals[sim.currentGreen].yellow = sim.defaultYellow
+        signals[sim.currentGreen].red = sim.defaultRed
+
+        if self.releaseAfterHold:
+            sim.currentGreen = self.waitingSignal
+        else:
+            signals[sim.nextGreen % sim.noOfSignals].red = sim.defaultRed
+            sim.currentGreen = sim.nextGreen
+            sim.nextGreen = (sim.currentGreen + 1) % sim.noOfSignals
+        self.startHold(sim.currentGreen)
+
+    def startHold(self, signal, event=None):
+        self.prioritySignal = signal
+        self.sim.signals[signal].green = self.sim.defaultMaximum
+        self.moveTo(PRIORITY_HOLD, event)
+
+    def onHold(self):
+
+        # keep the signal green while the priority vehicle is still short of
+        # the stop line, never below defaultMinimum
+        sim = self.sim
+        signal = sim.signals[self.prioritySignal]
+
+        if(signal.green > sim.defaultMinimum):
+
+            if self.priorityVehicle not in sim.priorityVehicles:
+                # PV has crossed
+                sim.log("-------------------Vehicle Crossed -----------------")
+                signal.green = sim.defaultMinimum
+                return self.endHold()
+
+            sim.printStatus()
+            signal.green -= 1
+            return 1
+
+        return self.endHold()
+
+    def endHold(self):
+
+        sim = self.sim
+        signals = sim.signals
+        signals[sim.nextGreen % sim.noOfSignals].red = signals[self.prioritySignal].green + signals[self.prioritySignal].yellow
+        signals[(sim.nextGreen + 1) % (sim.noOfSignals)].red = sim.defaultMaximum + sim.defaultYellow + signals[sim.nextGreen % sim.noOfSignals].red
+        signals[(sim.nextGreen + 2) % (sim.noOfSignals)].red = sim.defaultMaximum + sim.defaultYellow + signals[(sim.nextGreen + 1) % (sim.noOfSignals)].red
+
+        if self.releaseAfterHold:
+            self.moveTo(PRIORITY_RELEASE_GREEN)
+        else:
+            self.endPriority()
+
+    def onReleaseGreen(self):
+
+        sim = self.sim
+        signals = sim.signals
+        if(signals[self.prioritySignal].green > 0):
+            sim.printStatus()
+            signals[self.prioritySignal].green -= 1
+            signals[sim.nextGreen % sim.noOfSignals].red -= 1
+            return 1
+
+        sim.setTime()
+
+        sim.currentYellow = 1
+        sim.resetStops(sim.directionNumbers[self.prioritySignal])
+        self.moveTo(PRIORITY_RELEASE_YELLOW)
+
+    def onReleaseYellow(self):
+
+        sim = self.sim
+        signals = sim.signals
+        if(signals[self.prioritySignal].yellow > 0):
+            sim.printStatus()
+            signals[self.prioritySignal].yellow -= 1
+            signals[(sim.nextGreen) % (sim.noOfSignals)].red -= 1
+            return 1
+
+        sim.currentYellow = 0
+
+        signals[self.prioritySignal].green = sim.defaultMaximum
+        signals[self.prioritySignal].yellow = sim.defaultYellow
+
+        sim.currentGreen = sim.nextGreen
+        sim.nextGreen = (sim.currentGreen + 1) % sim.noOfSignals
+        signals[sim.nextGreen].red = signals[sim.currentGreen].yellow + signals[sim.currentGreen].green
+        self.endPriority()
+
+    def endPriority(self):
+        self.sim.sirenOn = False
+        self.priorityVehicle = None
+        self.detectionPending = False
+        self.moveTo(GREEN, 'resume')
@@ -0,0 +1,180 @@
+
+# coding: utf-8
+
+'''
+Logging for engine.py episodes.
+
+SimLogger takes print-style messages at a level (DEBUG, INFO, WARNING).
+Messages below the logger's level cost one comparison and are dropped; the
+others are formatted, kept in a ring buffer of the most recent `capacity`
+records and handed to a background thread that writes them to the stream in
+batches, every `interval` seconds or as soon as `batchSize` of them are
+waiting. A run so never blocks on the console, however much it logs.
+flush() writes everything pending right away. close(), at the end of an
+episode, flushes as well and lets go of the writer thread.
+
+All loggers of a process share that one thread, so several simulations in
+one process cost one thread between them. It starts with the first message
+of an open logger and ends once every logger is closed; anything still
+pending is written at exit.
+
+SignalTrace keeps the signal state of every simulated second (time, current
+green, yellow flag and the three timers of each signal) in a ring of
+int32 rows, which is what printStatus() used to print.
+'''
+
+import atexit
+import sys
+import threading
+import weakref
+from collections import deque
+
+import numpy as np
+
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+levels = {'debug': DEBUG, 'info': INFO, 'warning': WARNING}
+
+
+def levelFor(verbose):
+    # a level from True (INFO), False (WARNING), a level name or a number
+    if verbose is True:
+        return INFO
+    if verbose is False or verbose is None:
+        return WARNING
+    if isinstance(verbose, str):
+        return levels[verbose.lower()]
+    return int(verbose)
+
+
+class Writer:
+
+    # the thread that flushes every open SimLogger of the process
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.loggers = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+
+    def open(self, logger):
+        with self.lock:
+            self.loggers.add(logger)
+            self.interval = min(self.interval, logger.interval)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='simlog', daemon=True)
+                self.thread.start()
+
+    def close(self, logger):
+        with self.lock:
+            self.loggers.discard(logger)
+        self.wake.set()
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            with self.lock:
+                loggers = list(self.loggers)
+                if not loggers:
+                    self.thread = None
+                    return
+            for logger in loggers:
+                logger.flush()
+
+    def flushAll(self):
+        for logger in list(self.loggers):
+            logger.flush()
+
+
+writer = Writer()
+atexit.register(writer.flushAll)
+
+
+class SimLogger:
+
+    def __init__(self, level=INFO, stream=None, capacity=1000, batchSize=64, interval=0.2):
+        self.level = level
+        self.stream = stream
+        self.records = deque(maxlen=capacity)   # (level, message), most recent last
+        self.batchSize = batchSize
+        self.interval = interval
+        self.pending = []
+        self.lock = threading.Lock()
+        self.open = False     # registered with the writer thread
+
+    def isEnabledFor(self, level):
+        return level >= self.level
+
+    def log(self, level, *args):
+        if level < self.level:
+            return
+        record = (level, ' '.join(str(arg) for arg in args))
+        self.records.append(record)
+        with self.lock:
+            self.pending.append(record)
+            waiting = len(self.pending)
+        if not self.open:
+            self.open = True
+            writer.open(self)
+        if waiting >= self.batchSize:
+            writer.wake.set()
+
+    def debug(self, *args):
+        self.log(DEBUG, *args)
+
+    def info(self, *args):
+        self.log(INFO, *args)
+
+    def warning(self, *args):
+        self.log(WARNING, *args)
+
+    def flush(self):
+        # write every pending record now, in the order they were logged
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if batch:
+                stream = self.stream or sys.stdout
+                stream.write(''.join(message + '\n' for level, message in batch))
+                stream.flush()
+
+    def close(self):
+        # write what is pending and leave the writer thread; logging again
+        # opens the logger again
+        self.flush()
+        if self.open:
+            self.open = False
+            writer.close(self)
+
+    def recent(self, level=DEBUG):
+        # the buffered messages at `level` or above, oldest first
+        return [message for recordLevel, message in self.records if recordLevel >= level]
+
+
+class SignalTrace:
+
+    def __init__(self, noOfSignals, capacity=3600):
+        # columns: time, currentGreen, currentYellow, then red, yellow and
+        # green of every signal
+        self.noOfSignals = noOfSignals
+        self.rows = np.zeros((capacity, 3 + 3 * noOfSignals), dtype=np.int32)
+        self.count = 0     # rows recorded, including overwritten ones
+
+    def record(self, timeElapsed, currentGreen, currentYellow, signals):
+        row = self.rows[self.count % len(self.rows)]
+        row[:3] = timeElapsed, currentGreen, currentYellow
+        row[3:] = [value for signal in signals for value in (signal.red, signal.yellow, signal.green)]
+        self.count += 1
+
+    def snapshot(self):
+        # the recorded rows still held, oldest first
+        capacity = len(self.rows)
+        if self.count <= capacity:
+            return self.rows[:self.count].copy()
+        start = self.count % capacity
+        return np.concatenate([self.rows[start:], self.rows[:start]])
+
+    def __len__(self):
+        return min(self.count, len(self.rows))
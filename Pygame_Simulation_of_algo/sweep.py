@@ -0,0 +1,122 @@
+
+# coding: utf-8
+
+'''
+Parameter sweep over the headless engine.
+
+Every combination of the grid is run once per seed as an independent
+episode on a ProcessPoolExecutor (one worker per core by default), and each
+run becomes one CSV row: the parameters, the seed, vehicles crossed per
+direction, the average wait and the priority vehicle wait.
+
+    python sweep.py --param defaultMinimum=5,10,15 --param carTime=1.5,2 --seeds 3
+    python sweep.py --grid grid.json --out sweep.csv
+
+A grid file maps parameter names to lists of values, e.g.
+    {"defaultMinimum": [5, 10], "traffic_distribution": [[250, 500, 750, 1000], [400, 600, 800, 1000]]}
+
+With --log every run also writes its per-second signal state and a
+summary row to a columnar run log (runlog.py), partitioned by run id. The
+ids of one sweep share a unique prefix, followed by the job number.
+
+With --scenario every run replays the same recorded spawn stream (see
+scenario.py), so the configurations are compared on identical traffic:
+    python sweep.py --scenario rush.tscn --param detectionTime=3,5,8
+'''
+
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import runlog
+import scenario
+
+
+def runOne(job):
+
+    params, seed, scenarioPath, logDir, runId = job
+    replay = scenario.Scenario.load(scenarioPath) if scenarioPath else None
+    sim = engine.Simulation(seed, verbose=False, replay=replay, **params)
+    if logDir:
+        logger = runlog.RunLogger(logDir, runId)
+        logger.attach(sim)
+    result = sim.run()
+    if logDir:
+        logger.summary(sim, result, seed, params, scenarioPath)
+        logger.close()
+
+    row = dict(params)
+    row['seed'] = seed
+    row.update(result['crossed'])
+    row['total'] = result['total']
+    row['averageWait'] = round(result['averageWait'], 3)
+    row['priorityWait'] = '' if result['priorityWait'] is None else round(result['priorityWait'], 3)
+    return row
+
+
+def expandGrid(grid):
+
+    for name in grid:
+        if name not in engine.settings:
+            raise ValueError(f"unknown sweep parameter {name!r}, expected one of {', '.join(engine.settings)}")
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def sweep(grid, seeds, out, workers=None, scenarioPath=None, logDir=None):
+
+    # returns the number of rows written; a replayed scenario makes every
+    # seed see the same traffic, so one seed is enough then
+    sweepId = runlog.newRunId()
+    jobs = [(params, seed, scenarioPath, logDir, f'{sweepId}-{i:06d}')
+            for i, (params, seed) in enumerate((params, seed) for params in expandGrid(grid) for seed in seeds)]
+    workers = workers or os.cpu_count()
+    columns = list(grid) + ['seed'] + [engine.directionNumbers[i] for i in range(engine.noOfSignals)] + \
+        ['total', 'averageWait', 'priorityWait']
+
+    with open(out, 'w', newline='') as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        chunksize = max(1, len(jobs) // (workers * 4))
+        for row in executor.map(runOne, jobs, chunksize=chunksize):
+            for name in grid:
+                if isinstance(row[name], (list, tuple)):
+                    row[name] = json.dumps(row[name])
+            writer.writerow(row)
+    return len(jobs)
+
+
+def parseParam(text):
+
+    # name=v1,v2,...; each value is read as JSON so numbers and true/false work
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected name=value[,value...], got {text!r}")
+    return name, [json.loads(value) for value in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep signal timing parameters over headless episodes')
+    parser.add_argument('--grid', help='JSON file of parameter name -> list of values')
+    parser.add_argument('--param', type=parseParam, action='append', default=[],
+                        help='name=v1,v2,... (may be repeated)')
+    parser.add_argument('--seeds', type=int, default=1, help='runs per configuration, seeded 0..n-1')
+    parser.add_argument('--workers', type=int, help='worker processes (default: all cores)')
+    parser.add_argument('--scenario', help='recorded scenario file every run replays')
+    parser.add_argument('--log', help='directory for columnar run logs of every run')
+    parser.add_argument('--out', default='sweep.csv')
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as file:
+            grid.update(json.load(file))
+    grid.update(dict(args.param))
+
+    count = sweep(grid, range(args.seeds), args.out, args.workers, args.scenario, args.log)
+    print(f"{count} runs written to {args.out}")
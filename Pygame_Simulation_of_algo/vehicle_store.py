@@ -0,0 +1,341 @@
+
+# coding: utf-8
+
+'''
+Structure-of-arrays storage for the vehicles of engine.py.
+
+Every vehicle is one row of a set of NumPy buffers (position, size, speed,
+stop coordinate, crossed/turned flags, rotation) and move_all() advances all
+of them in one vectorized step, so a frame costs about the same with 5000
+queued vehicles as with 50.
+
+The direction and lane specific rules of the old Vehicle.move() are turned
+into numbers, one row of `laneParams` per (direction, lane), so every rule
+has the same form. A vehicle's "front" and "back" are its edges along the
+axis it is moving on, signed so that "ahead" is always the larger value
+(left/up roads count backwards). They are kept up to date as the vehicle
+moves, and recomputed with the image size on spawn and rotation.
+
+Every vehicle is on a road: the lane it was spawned in, or, once it has
+turned, the lane of the exit road it came out on (the approach lane moving
+the same way whose line is nearest to it). The rows are sorted by road and
+back edge, so the vehicle ahead of any row on its road, whatever direction
+that vehicle came from, is its neighbour in the sorted order and lands in
+`leader`. One gap check against it covers the approach and the exit road:
+    front - back[leader] < -movingGap
+A vehicle only moves with that gap ahead of it, and by less than the gap,
+so vehicles never pass each other on a road and the order only changes
+when a vehicle joins or leaves one (spawn, release) or rotates. The rows
+are sorted again after those only, not every frame. `back` has one slot
+more than the other buffers, always +inf, which is what a row without a
+leader (-1) compares against.
+
+The per-lane rules are also kept per row as thresholds, so each costs one
+comparison a frame: `crossAt` (the stop line, +inf once crossed), `holdAt`
+(the stop coordinate, +inf once crossed), `turnAt` (the turning point,
++inf for a vehicle going straight on, -inf once turned) and `heading`, the
+unit move along the approach road, then along the exit road.
+
+All rules are evaluated on the positions at the start of the frame, and
+the moves are applied after that.
+
+Delay metrics (metrics.py) are recorded on the way: `waited` counts the
+frames a vehicle stood before its stop line, `spawnFrame` and `crossFrame`
+are store frames (calls of move_all()) and `freeFlow` is the frames the
+vehicle would need to reach the stop line without stopping.
+
+`queued[direction, vehicleClass]` counts the vehicles that have not crossed
+their stop line yet. It is kept up to date on add() and on crossing in
+move_all(), so queue lengths never need a scan.
+
+Rows of vehicles that have left the screen are given back with release()
+and handed out again by add(), so `count` only grows to the largest number
+of vehicles on the roads at once. A released row is parked: crossed, not
+alive and without speed, so move_all() leaves it where it is.
+'''
+
+import numpy as np
+
+
+# columns of laneParams
+(APPROACH_AXIS, APPROACH_SIGN, STOP_LINE, TURN_AT, TURN_DX, TURN_DY,
+ EXIT_AXIS, EXIT_SIGN, LATERAL) = range(9)
+noOfParams = 9
+
+# spacing of roads in the sort key, wider than any signed coordinate
+roadSpan = 1 << 16
+
+# what move_all() returns for a frame in which nobody crossed
+noCrossings = np.zeros(4, dtype=np.int64)
+noCrossings.flags.writeable = False
+
+# the buffers move_all() uses every frame, as [:count] views
+frameFields = ('pos', 'lastPos', 'size', 'front', 'back', 'speed', 'crossed', 'turned', 'direction',
+               'waited', 'crossAt', 'holdAt', 'turnAt', 'heading')
+
+
+class VehicleStore:
+
+    def __init__(self, laneParams, sizeTable, rotationAngle, noOfClasses, capacity=256):
+        # laneParams: (directions*lanes, noOfParams) rules per lane
+        # sizeTable: (sizeKeys, rotation steps, 2) image size per rotation
+        self.laneParams = np.asarray(laneParams, dtype=np.float64)
+        self.sizeTable = np.asarray(sizeTable, dtype=np.float64)
+        self.rotationAngle = rotationAngle
+        self.noOfClasses = noOfClasses
+        self.queued = np.zeros((4, noOfClasses), dtype=np.int64)
+        self.free = []     # released rows, reused before count grows
+        self.count = 0
+        self.spawned = 0
+        self.frame = 0     # calls of move_all() so far
+        self.orderDirty = True     # leader needs a sort before the next frame
+        self.viewCount = -1        # count the cached views were taken at
+        self.allocate(capacity)
+
+    # per-vehicle buffers: name -> (shape after the row axis, dtype, fill)
+    fields = {
+        'pos': ((2,), np.float64, 0),
+        'lastPos': ((2,), np.float64, 0),    # pos before the last move_all()
+        'heading': ((2,), np.float64, 0),    # unit move along the road the vehicle is on
+        'size': ((2,), np.float64, 0),
+        'front': ((), np.float64, 0),
+        'back': ((), np.float64, 0),
+        'speed': ((), np.float64, 0),
+        'stop': ((), np.float64, 0),
+        'crossAt': ((), np.float64, np.inf),
+        'holdAt': ((), np.float64, np.inf),
+        'turnAt': ((), np.float64, np.inf),
+        'crossed': ((), bool, False),
+        'turned': ((), bool, False),
+        'willTurn': ((), bool, False),
+        'active': ((), bool, False),
+        'rotateAngle': ((), np.int64, 0),
+        'direction': ((), np.int64, 0),
+        'vehicleClass': ((), np.int64, 0),
+        'sizeKey': ((), np.int64, 0),
+        'road': ((), np.int64, -1),      # lane index the vehicle is driving in
+        'seq': ((), np.int64, 0),        # spawn order, breaks ties in the road order
+        'leader': ((), np.int64, -1),    # row ahead on the same road, as of the last frame
+        'waited': ((), np.int64, 0),     # frames held before the stop line
+        'spawnFrame': ((), np.int64, 0),
+        'crossFrame': ((), np.int64, -1),
+        'freeFlow': ((), np.float64, 0),
+        'alive': ((), bool, False),
+    }
+
+    def allocate(self, capacity):
+        # (re)allocate every buffer, keeping the rows already filled
+        for name, (shape, dtype, fill) in self.fields.items():
+            rows = capacity + 1 if name == 'back' else capacity
+            buffer = np.full((rows,) + shape, fill, dtype=dtype)
+            if self.count:
+                buffer[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, buffer)
+        self.back[capacity] = np.inf
+        self.viewCount = -1
+        # lane rules are kept column-wise so each rule is one contiguous array
+        params = np.zeros((noOfParams, capacity))
+        if self.count:
+            params[:, :self.count] = self.params[:, :self.count]
+        self.params = params
+        self.capacity = capacity
+
+    def add(self, lane, directionNumber, vehicleClass, sizeKey, speed, x, y, stop, willTurn, active):
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.allocate(self.capacity * 2)
+            row = self.count
+            self.count += 1
+        self.alive[row] = True
+        self.pos[row] = x, y
+        self.lastPos[row] = x, y
+        self.sizeKey[row] = sizeKey
+        self.size[row] = self.sizeTable[sizeKey, 0]
+        self.speed[row] = speed
+        self.stop[row] = stop
+        self.crossed[row] = False
+        self.turned[row] = False
+        self.willTurn[row] = willTurn
+        self.active[row] = active
+        self.rotateAngle[row] = 0
+        self.direction[row] = directionNumber
+        self.vehicleClass[row] = vehicleClass
+        self.road[row] = directionNumber * 3 + lane
+        self.seq[row] = self.spawned
+        self.spawned += 1
+        self.leader[row] = -1
+        self.waited[row] = 0
+        self.params[:, row] = self.laneParams[directionNumber * 3 + lane]
+        self.heading[row] = 0
+        self.heading[row, int(self.params[APPROACH_AXIS, row])] = self.params[APPROACH_SIGN, row]
+        self.crossAt[row] = self.params[STOP_LINE, row]
+        self.holdAt[row] = self.params[APPROACH_SIGN, row] * stop
+        self.turnAt[row] = self.params[TURN_AT, row] if willTurn else np.inf
+        self.updateEdges([row])
+        self.spawnFrame[row] = self.frame
+        self.crossFrame[row] = -1
+        self.freeFlow[row] = max(self.params[STOP_LINE, row] - self.front[row], 0) / speed
+        self.queued[directionNumber, vehicleClass] += 1
+        self.orderDirty = True
+        return row
+
+    def release(self, row):
+
+        # park a row off every road until add() hands it out again
+        self.alive[row] = False
+        self.crossed[row] = True
+        self.turned[row] = False
+        self.willTurn[row] = False
+        self.active[row] = False
+        self.speed[row] = 0
+        self.heading[row] = 0
+        self.crossAt[row] = np.inf
+        self.holdAt[row] = np.inf
+        self.turnAt[row] = np.inf
+        self.road[row] = -1
+        self.free.append(row)
+        self.orderDirty = True
+
+    def setStop(self, row, value):
+        # a new stop coordinate, e.g. after a priority vehicle cleared the queue
+        self.stop[row] = value
+        if not self.crossed[row]:
+            self.holdAt[row] = self.params[APPROACH_SIGN, row] * value
+
+    def views(self):
+        # frameFields as [:count] views, taken again when count or the
+        # buffers change
+        if self.viewCount != self.count:
+            self.viewCount = self.count
+            self.frameViews = tuple(getattr(self, name)[:self.count] for name in frameFields)
+        return self.frameViews
+
+    def exitedRows(self, width, height):
+
+        # rows of crossed vehicles whose image is entirely off the screen
+        n = self.count
+        pos = self.pos[:n]
+        size = self.size[:n]
+        outside = (pos[:, 0] > width) | (pos[:, 0] + size[:, 0] < 0) | \
+            (pos[:, 1] > height) | (pos[:, 1] + size[:, 1] < 0)
+        return np.flatnonzero(self.alive[:n] & self.crossed[:n] & outside)
+
+    def queuedPast(self, directionNumber, line, width, height):
+
+        # whether an uncrossed vehicle of the direction is on the screen
+        # with its front past `line`, a coordinate on its approach axis
+        n = self.count
+        pos = self.pos[:n]
+        waiting = (self.direction[:n] == directionNumber) & ~self.crossed[:n]
+        onScreen = (pos[:, 0] > 0) & (pos[:, 0] < width) & (pos[:, 1] > 0) & (pos[:, 1] < height)
+        past = self.front[:n] > self.params[APPROACH_SIGN, :n] * line
+        return bool((waiting & onScreen & past).any())
+
+    def updateEdges(self, rows):
+        # signed front and back edges along the road the rows are moving on,
+        # for rows whose image changed; moves shift both by the speed
+        params = self.params[:, rows]
+        turned = self.turned[rows]
+        axis = np.where(turned, params[EXIT_AXIS], params[APPROACH_AXIS]).astype(np.int64)
+        sign = np.where(turned, params[EXIT_SIGN], params[APPROACH_SIGN])
+        position = self.pos[rows, axis]
+        length = self.size[rows, axis]
+        self.front[rows] = sign * position + (sign > 0) * length
+        self.back[rows] = sign * position - (sign < 0) * length
+
+    def exitRoads(self, rows):
+        # lane of the exit road each turned row came out on: the approach
+        # lane moving the same way whose line is closest to the row
+        params = self.params[:, rows]
+        lanes = self.laneParams
+        axis = params[EXIT_AXIS].astype(np.int64)
+        lateral = self.pos[rows, 1 - axis]
+        sameWay = (lanes[:, APPROACH_AXIS] == params[EXIT_AXIS, :, None]) & \
+            (lanes[:, APPROACH_SIGN] == params[EXIT_SIGN, :, None])
+        distance = np.where(sameWay, np.abs(lanes[:, LATERAL] - lateral[:, None]), np.inf)
+        return distance.argmin(axis=1)
+
+    def findLeaders(self):
+
+        # nearest vehicle ahead of every row on its road, -1 for the first;
+        # ties (vehicles stacked at the spawn point) go to the earlier spawn
+        n = self.count
+        road = self.road[:n]
+        order = np.lexsort((-self.seq[:n], road * roadSpan + self.back[:n]))
+        ahead = order[1:]
+        behind = order[:-1]
+        sameRoad = (road[ahead] == road[behind]) & (road[behind] >= 0)
+        leader = self.leader[:n]
+        leader[:] = -1
+        leader[behind[sameRoad]] = ahead[sameRoad]
+        self.orderDirty = False
+        return leader
+
+    def move_all(self, currentGreen, currentYellow, movingGap):
+
+        # one frame for every vehicle; returns how many vehicles crossed
+        # the stop line of each direction during the frame
+        n = self.count
+        self.frame += 1
+        if n == 0:
+            return noCrossings
+
+        (pos, lastPos, size, front, back, speed, crossed, turned, direction,
+         waited, crossAt, holdAt, turnAt, heading) = self.views()
+        lastPos[:] = pos
+        leader = self.findLeaders() if self.orderDirty else self.leader[:n]
+
+        # if the image has crossed stop lines
+        newlyCrossed = front > crossAt
+        crossedNow = noCrossings
+        if np.count_nonzero(newlyCrossed):
+            rows = np.flatnonzero(newlyCrossed)
+            crossed[rows] = True
+            crossAt[rows] = np.inf
+            holdAt[rows] = np.inf
+            self.crossFrame[rows] = self.frame - 1
+            keys = direction[rows] * self.noOfClasses + self.vehicleClass[rows]
+            self.queued -= np.bincount(keys, minlength=self.queued.size).reshape(self.queued.shape)
+            crossedNow = np.bincount(direction[rows], minlength=4)
+
+        # still on the approach road: not turning, or not yet at the turning
+        # point; the others are rotating or, once turned, on the exit road
+        straight = front < turnAt
+        turning = ~straight ^ turned
+
+        # (not at its stop coordinate or has crossed stop line or has green signal)
+        # and (first vehicle on the road or enough gap to the vehicle ahead of it)
+        green = direction == (currentGreen if currentYellow == 0 else -1)
+        canGo = (front <= holdAt) | green
+        gapOk = front - self.back[leader] < -movingGap
+        go = straight & canGo & gapOk
+        waited += ~(crossed | go)
+
+        # straight on, or after turning follow the vehicle ahead on the exit
+        # road; both are one move along the heading
+        step = speed * (go | (turned & gapOk))
+        pos += heading * step[:, None]
+        front += step
+        back += step
+
+        # rotate a step towards the exit road
+        if np.count_nonzero(turning):
+            params = self.params
+            rotating = np.flatnonzero(turning)
+            self.rotateAngle[rotating] += self.rotationAngle
+            pos[rotating, 0] += params[TURN_DX, rotating]
+            pos[rotating, 1] += params[TURN_DY, rotating]
+            turned[rotating] = self.rotateAngle[rotating] == 90
+            size[rotating] = self.sizeTable[self.sizeKey[rotating], self.rotateAngle[rotating] // self.rotationAngle]
+            self.updateEdges(rotating)
+            done = rotating[turned[rotating]]
+            if len(done):
+                self.road[done] = self.exitRoads(done)
+                turnAt[done] = -np.inf
+                heading[done] = 0
+                heading[done, params[EXIT_AXIS, done].astype(np.int64)] = params[EXIT_SIGN, done]
+            self.orderDirty = True
+
+        return crossedNow
@@ -3,10 +3,16 @@ import cv2
 import torch
 import numpy as np
 from ultralytics import YOLO
+import json
+import os
+import queue
 import random
 import tempfile
+import threading
 import time
 from tqdm import tqdm
+from lanes import CountStream, LaneCounter, load_lanes, whole_frame
+from tracker import DetectionSchedule, Tracker
 
 # Downloading the images and video from Google Drive
 def download_file(url, save_name):
@@ -23,13 +29,29 @@ for url, save_name in file_urls:
     download_file(url, save_name)
 
 # Initialize the model
-model = YOLO('best.pt')
+model_path = 'best.pt'
+model = YOLO(model_path)
 
 # Define a color for each class
 class_colors = {}
 for class_id in range(len(model.names)):
     class_colors[class_id] = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
 
+# Lane polygons for the per-lane counts, see lanes.py; without a lanes.json
+# every vehicle in the frame is counted in one lane, which has no approach
+# the simulation could time from
+lanes_path = 'lanes.json'
+configured_lanes = load_lanes(lanes_path) if os.path.exists(lanes_path) else None
+if configured_lanes is None:
+    print(f"No {lanes_path}: counting the whole frame as one lane without a direction")
+
+# Every video run writes its counts here, so the simulation can follow them
+# live with --detector-counts; the file starts afresh with each run
+counts_path = os.path.abspath('lane_counts.jsonl')
+
+def lane_counter(width, height):
+    return LaneCounter(configured_lanes or whole_frame(width, height), model.names)
+
 def draw_boxes(image, boxes, labels, colors):
     for box, label, color in zip(boxes, labels, colors):
         top_left = (int(box[0]), int(box[1]))
@@ -38,21 +60,22 @@ def draw_boxes(image, boxes, labels, colors):
         cv2.putText(image, label, (top_left[0], top_left[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
     return image
 
-def show_preds_image(image_path, conf_threshold=0.25, iou_threshold=0.45):
-    image = cv2.imread(image_path)
-    results = model(image, conf=conf_threshold, iou=iou_threshold)
-    boxes = []
-    labels = []
-    colors = []
-    num_boxes_detected = 0
-    for result in results:
-        for box, cls, conf in zip(result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy(), result.boxes.conf.cpu().numpy()):
-            boxes.append(box)
-            label = result.names[int(cls)]
-            labels.append(f'{label} {conf:.2f}')
-            colors.append(class_colors[int(cls)])
-            num_boxes_detected += 1
+def detections(result):
+    # boxes, class ids and confidences of one result as NumPy arrays, so the
+    # annotate stage never touches the model's tensors; no track ids
+    return (result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy(),
+            result.boxes.conf.cpu().numpy(), result.names, None)
+
+def tracked(rows):
+    # Tracker rows (x1 y1 x2 y2 conf cls id) in the same form as detections()
+    return rows[:, :4], rows[:, 5], rows[:, 4], model.names, rows[:, 6]
 
+def annotate(image, detected):
+    boxes, classes, confs, names, ids = detected
+    labels = [f'{names[int(cls)]} {conf:.2f}' for cls, conf in zip(classes, confs)]
+    if ids is not None:
+        labels = [f'#{int(track_id)} {label}' for track_id, label in zip(ids, labels)]
+    colors = [class_colors[int(cls)] for cls in classes]
     image = draw_boxes(image, boxes, labels, colors)
 
     # Display the count on the top right corner
@@ -60,15 +83,183 @@ def show_preds_image(image_path, conf_threshold=0.25, iou_threshold=0.45):
     font_scale = 1
     font_thickness = 2
     font_color = (255, 255, 255)
-    count_text = f'Boxes Detected: {num_boxes_detected}'
+    count_text = f'Boxes Detected: {len(boxes)}'
     text_size = cv2.getTextSize(count_text, font, font_scale, font_thickness)[0]
     text_x = image.shape[1] - text_size[0] - 10
     text_y = text_size[1] + 10
     cv2.putText(image, count_text, (text_x, text_y), font, font_scale, font_color, font_thickness, lineType=cv2.LINE_AA)
+    return image
+
+def show_preds_image(image_path, conf_threshold=0.25, iou_threshold=0.45):
+    image = cv2.imread(image_path)
+    results = model(image, conf=conf_threshold, iou=iou_threshold)
+    detected = detections(results[0])
+    counter = lane_counter(image.shape[1], image.shape[0])
+    counts = counter.record(0, counter.count(detected[0], detected[1], image.shape))
+    image = counter.draw(annotate(image, detected))
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB), counts
+
+# Video runs as three stages on their own threads, joined by bounded queues:
+# decode -> frame_queue -> batched inference -> result_queue -> annotate/encode.
+# A full queue blocks the stage feeding it, so a slow stage holds back the
+# others instead of frames piling up in memory, and the total time is about
+# that of the slowest stage rather than the sum of all three.
+queue_size = 16  # frames buffered between two stages
+end_of_stream = None
+
+def put(q, item, stop):
+    # blocking put that gives up once another stage has failed
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return end_of_stream
+
+def run_stage(target, stop, errors, *args):
+    # a stage that fails stops the whole pipeline; the error is re-raised
+    # by show_preds_video
+    try:
+        target(*args, stop)
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+
+def decode_frames(cap, frame_queue, stop):
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if not put(frame_queue, frame, stop):
+                break
+    finally:
+        put(frame_queue, end_of_stream, stop)
 
-    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+def infer_batches(frame_queue, result_queue, batch_size, conf_threshold, iou_threshold,
+                  detect_every, motion_threshold, stop):
+    # only the frames the schedule picks go through the model, batch_size
+    # at a time; the tracker carries every box through the frames between
+    schedule = DetectionSchedule(detect_every, motion_threshold)
+    tracker = Tracker()
+    # a chunk ends at its batch_size-th frame to detect, so motion
+    # re-detections never make a model call larger than the tuned size, or
+    # at chunk_frames frames, so the frames held here stay as bounded as the
+    # queues; with every Nth frame detected that makes smaller model calls
+    chunk_frames = max(batch_size, queue_size)
+    try:
+        finished = False
+        while not finished:
+            frames = []
+            detect = []
+            while sum(detect) < batch_size and len(frames) < chunk_frames:
+                frame = get(frame_queue, stop)
+                if frame is end_of_stream:
+                    finished = True
+                    break
+                frames.append(frame)
+                detect.append(schedule.should_detect(frame))
+            # the last batch is usually partial and is run all the same
+            if frames:
+                detect_frames = [frame for frame, flag in zip(frames, detect) if flag]
+                batch_results = iter(model(detect_frames, conf=conf_threshold, iou=iou_threshold) if detect_frames else [])
+                # results are queued frame by frame, so the queue holds
+                # queue_size frames whatever the chunk length
+                for frame, flag in zip(frames, detect):
+                    if flag:
+                        boxes, classes, confs, names, ids = detections(next(batch_results))
+                        rows = tracker.update(np.column_stack([boxes, confs, classes]))
+                    else:
+                        rows = tracker.predict()
+                    if not put(result_queue, (frame, tracked(rows)), stop):
+                        return
+    finally:
+        put(result_queue, end_of_stream, stop)
+
+def encode_frames(out, result_queue, progress, counter, stream, fps, stop):
+    frame_index = 0
+    while True:
+        item = get(result_queue, stop)
+        if item is end_of_stream:
+            break
+        frame, detected = item
+        counts = counter.count(detected[0], detected[1], frame.shape)
+        stream.write(counter.record(frame_index, counts, frame_index / fps))
+        out.write(counter.draw(annotate(frame, detected)))
+        progress.update(1)
+        frame_index += 1
+
+# The batch size is measured rather than guessed: for every model, device
+# (GPU, or CPU and its thread count) and resolution, batches of increasing
+# size are timed on a frame of the video until the frames per second stop
+# improving or memory runs out, and the fastest size is kept in
+# batch_size_cache.json for later runs.
+batch_size_cache_path = 'batch_size_cache.json'
+probe_batch_sizes = (1, 2, 4, 8, 16, 32)
+
+def load_batch_size_cache():
+    try:
+        with open(batch_size_cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-def show_preds_video(video_path, conf_threshold=0.25, iou_threshold=0.45):
+batch_size_cache = load_batch_size_cache()
+
+def device_name():
+    if torch.cuda.is_available():
+        return torch.cuda.get_device_name(0)
+    return f'cpu-{torch.get_num_threads()}threads'
+
+def probe_batch_size(frame, repeats=3):
+    model(frame)  # warm up, so the first timing does not include setup
+    best_size, best_rate = 1, 0.0
+    for size in probe_batch_sizes:
+        frames = [frame] * size
+        try:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                model(frames)
+            rate = size * repeats / (time.perf_counter() - start)
+        except RuntimeError:
+            # out of memory: the previous size is the largest that fits
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            break
+        print(f"Batch size {size}: {rate:.1f} frames/s")
+        if rate > best_rate * 1.05:
+            best_size, best_rate = size, rate
+        elif rate < best_rate:
+            break
+    return best_size
+
+def tuned_batch_size(video_path):
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        return 1
+    height, width = frame.shape[:2]
+    key = f'{os.path.abspath(model_path)}|{device_name()}|{width}x{height}'
+    if key not in batch_size_cache:
+        batch_size_cache[key] = probe_batch_size(frame)
+        with open(batch_size_cache_path, 'w') as f:
+            json.dump(batch_size_cache, f, indent=2)
+    return batch_size_cache[key]
+
+def show_preds_video(video_path, conf_threshold=0.25, iou_threshold=0.45, detect_every=1, motion_threshold=0):
+    # detect_every: run the detector on every Nth frame and track in between;
+    # motion_threshold: also detect when the scene changed by more than this
+    # mean grey level since the last detection (0 = off)
     start_time = time.time()
     print("Starting video processing...")
 
@@ -84,57 +275,51 @@ def show_preds_video(video_path, conf_threshold=0.25, iou_threshold=0.45):
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
 
-    batch_size = 4  # Adjust this based on your GPU memory
-    frames = []
+    # per-lane, per-class counts of every frame as JSON lines, timed in
+    # seconds of video
+    counter = lane_counter(width, height)
+    stream = CountStream(counts_path)
+    print(f"Writing lane counts to {counts_path}")
 
-    for _ in tqdm(range(total_frames), desc="Processing frames"):
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frames.append(frame)
-
-        if len(frames) == batch_size or not ret:
-            batch_results = model(frames, conf=conf_threshold, iou=iou_threshold)
-
-            for frame, result in zip(frames, batch_results):
-                frame_copy = frame.copy()
-                boxes = []
-                labels = []
-                colors = []
-                num_boxes_detected = 0
-
-                for box, cls, conf in zip(result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy(), result.boxes.conf.cpu().numpy()):
-                    boxes.append(box)
-                    label = result.names[int(cls)]
-                    labels.append(f'{label} {conf:.2f}')
-                    colors.append(class_colors[int(cls)])
-                    num_boxes_detected += 1
-
-                frame_copy = draw_boxes(frame_copy, boxes, labels, colors)
-
-                # Display the count on the top right corner
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                font_scale = 1
-                font_thickness = 2
-                font_color = (255, 255, 255)
-                count_text = f'Boxes Detected: {num_boxes_detected}'
-                text_size = cv2.getTextSize(count_text, font, font_scale, font_thickness)[0]
-                text_x = frame_copy.shape[1] - text_size[0] - 10
-                text_y = text_size[1] + 10
-                cv2.putText(frame_copy, count_text, (text_x, text_y), font, font_scale, font_color, font_thickness, lineType=cv2.LINE_AA)
-
-                out.write(frame_copy)
+    batch_size = tuned_batch_size(video_path)
+    print(f"Batch size: {batch_size}")
+    frame_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    progress = tqdm(total=total_frames, desc="Processing frames")
 
-            frames = []
+    stages = [
+        threading.Thread(target=run_stage, args=(decode_frames, stop, errors, cap, frame_queue), daemon=True),
+        threading.Thread(target=run_stage, args=(infer_batches, stop, errors, frame_queue, result_queue,
+                                                 batch_size, conf_threshold, iou_threshold,
+                                                 detect_every, motion_threshold), daemon=True),
+        threading.Thread(target=run_stage, args=(encode_frames, stop, errors, out, result_queue, progress,
+                                                 counter, stream, fps or 30), daemon=True),
+    ]
+    try:
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+    finally:
+        stop.set()
+        progress.close()
+        cap.release()
+        out.release()
+        stream.close()
 
-    cap.release()
-    out.release()
+    if errors:
+        raise errors[0]
 
     end_time = time.time()
     total_time = end_time - start_time
     print(f"Video processing completed in {total_time:.2f} seconds.")
 
-    return output_path
+    return output_path, counts_path
+
+# Tune for the example video up front, so its first run starts straight away
+tuned_batch_size('video.mp4')
 
 inputs_image = [
     gr.components.Image(type="filepath", label="Input Image"),
@@ -143,6 +328,7 @@ inputs_image = [
 ]
 outputs_image = [
     gr.components.Image(type="numpy", label="Output Image"),
+    gr.components.JSON(label="Lane Counts"),
 ]
 interface_image = gr.Interface(
     fn=show_preds_image,
@@ -155,9 +341,11 @@ interface_image = gr.Interface(
 inputs_video = [
     gr.Video(label="Input Video"),
     gr.Slider(minimum=0.0, maximum=1.0, value=0.25, step=0.05, label="Confidence Threshold"),
-    gr.Slider(minimum=0.0, maximum=1.0, value=0.45, step=0.05, label="IOU Threshold")
+    gr.Slider(minimum=0.0, maximum=1.0, value=0.45, step=0.05, label="IOU Threshold"),
+    gr.Slider(minimum=1, maximum=10, value=1, step=1, label="Detect Every N Frames"),
+    gr.Slider(minimum=0, maximum=50, value=0, step=1, label="Re-detect On Motion (0 = off)")
 ]
-outputs_video = gr.Video(label="Output Video")
+outputs_video = [gr.Video(label="Output Video"), gr.File(label="Lane Counts (JSON lines)")]
 
 interface_video = gr.Interface(
     fn=show_preds_video,
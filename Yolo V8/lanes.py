@@ -0,0 +1,87 @@
+import json
+import time
+
+import cv2
+import numpy as np
+
+# Per-lane vehicle counting on top of the detector. Lanes are polygons in
+# image coordinates, read from a JSON file such as
+#     {"lanes": [{"name": "north-0", "direction": "down", "polygon": [[610, 80], [660, 80], [700, 400], [620, 400]]},
+#                ...]}
+# where "direction" is the simulation's approach the lane belongs to
+# (right, down, left or up). A vehicle is in the lane that contains the
+# bottom centre of its box, where it touches the road. The polygons are
+# rasterised once per frame size into a label mask, so counting a frame is
+# one array lookup per box whatever the number of lanes.
+
+
+def load_lanes(path):
+    with open(path) as f:
+        return json.load(f)['lanes']
+
+
+def whole_frame(width, height):
+    # one lane covering the frame, for when no lanes are configured
+    return [{'name': 'frame', 'direction': None, 'polygon': [[0, 0], [width, 0], [width, height], [0, height]]}]
+
+
+class LaneCounter:
+    def __init__(self, lanes, names):
+        # lanes: list of {"name", "direction", "polygon"}; names: class id -> class name
+        self.lanes = lanes
+        self.names = names
+        self.mask = None
+
+    def lane_mask(self, shape):
+        # lane index + 1 of every pixel, 0 outside every lane; lanes listed
+        # later win where polygons overlap
+        if self.mask is None or self.mask.shape != shape[:2]:
+            mask = np.zeros(shape[:2], dtype=np.uint8)
+            for i, lane in enumerate(self.lanes):
+                cv2.fillPoly(mask, [np.asarray(lane['polygon'], dtype=np.int32)], i + 1)
+            self.mask = mask
+        return self.mask
+
+    def count(self, boxes, classes, shape):
+        # per lane, per class name counts of one frame's boxes (x1 y1 x2 y2)
+        counts = {lane['name']: {} for lane in self.lanes}
+        if len(boxes):
+            mask = self.lane_mask(shape)
+            boxes = np.asarray(boxes)
+            x = np.clip(((boxes[:, 0] + boxes[:, 2]) / 2).astype(int), 0, shape[1] - 1)
+            y = np.clip(boxes[:, 3].astype(int), 0, shape[0] - 1)
+            for lane_index, cls in zip(mask[y, x], classes):
+                if lane_index:
+                    lane = counts[self.lanes[lane_index - 1]['name']]
+                    name = self.names[int(cls)]
+                    lane[name] = lane.get(name, 0) + 1
+        return counts
+
+    def record(self, frame_index, counts, timestamp=None):
+        # one entry of the count stream
+        return {'frame': frame_index, 'time': time.time() if timestamp is None else timestamp,
+                'lanes': [{'name': lane['name'], 'direction': lane.get('direction'), 'counts': counts[lane['name']]}
+                          for lane in self.lanes]}
+
+    def draw(self, image):
+        for lane in self.lanes:
+            polygon = np.asarray(lane['polygon'], dtype=np.int32)
+            cv2.polylines(image, [polygon], True, (255, 255, 0), 1)
+            cv2.putText(image, lane['name'], tuple(int(v) for v in polygon[0]), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        return image
+
+
+class CountStream:
+    # starts the file afresh and writes one JSON line per record, flushed at
+    # once, so a reader such as the simulation's detector feed sees every
+    # frame as it is counted
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -2,7 +2,9 @@ import gradio as gr
 import cv2
 import requests
 import os
+import tempfile
 from ultralytics import YOLO
+from tracker import DetectionSchedule, Tracker
 
 file_urls = [
     'https://drive.google.com/uc?export=download&id=1nqF_ORRO3bHfjccK-HSwx6NsLnIz7r4z',
@@ -26,11 +28,13 @@ model = YOLO('best.pt')
 path = [['image_0.jpg'], ['image_1.jpg']]
 video_path = [['video.mp4']]
 
-def show_preds_image(image_path):
-    image = cv2.imread(image_path)
-    outputs = model.predict(source=image_path)
-    results = outputs[0].cpu().numpy()
-    for i, det in enumerate(results.boxes.xyxy):
+def draw_detections(image, rows, names, ids=None):
+    # rows are x1, y1, x2, y2, confidence, class, as in boxes.data;
+    # ids are the tracker's ids of the rows, if any
+    for i, det in enumerate(rows):
+        label = f"{names[int(det[5])]}: {det[4]:.2f}"
+        if ids is not None:
+            label = f"#{int(ids[i])} {label}"
         cv2.rectangle(
             image,
             (int(det[0]), int(det[1])),
@@ -41,7 +45,7 @@ def show_preds_image(image_path):
         )
         cv2.putText(
             image,
-            f"{results.names[int(det[-1])]}: {det[-2]:.2f}",
+            label,
             (int(det[0]), int(det[1]) - 10),
             cv2.FONT_HERSHEY_SIMPLEX,
             0.5,
@@ -49,6 +53,13 @@ def show_preds_image(image_path):
             2,
             cv2.LINE_AA
         )
+    return image
+
+def show_preds_image(image_path):
+    image = cv2.imread(image_path)
+    outputs = model.predict(source=image_path)
+    results = outputs[0].cpu().numpy()
+    image = draw_detections(image, results.boxes.data, results.names)
     return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
 inputs_image = [
@@ -66,44 +77,67 @@ interface_image = gr.Interface(
     cache_examples=False,
 )
 
-def show_preds_video(video_path):
+# frames held at a time, and the most that go through one model.predict call
+batch_size = 8
+
+def annotate_batch(frames, detect, out, tracker):
+    # only the frames flagged in detect go through the model; the tracker
+    # carries every box through the frames between
+    detect_frames = [frame for frame, flag in zip(frames, detect) if flag]
+    outputs = iter(model.predict(source=detect_frames) if detect_frames else [])
+    for frame, flag in zip(frames, detect):
+        if flag:
+            rows = tracker.update(next(outputs).cpu().numpy().boxes.data)
+        else:
+            rows = tracker.predict()
+        out.write(draw_detections(frame, rows[:, :6], model.names, rows[:, 6]))
+
+def show_preds_video(video_path, detect_every=1, motion_threshold=0):
+    # annotated frames go straight to an encoder, so memory stays the same
+    # however long the video is; returns the path of the annotated video.
+    # detect_every: run the detector on every Nth frame and track in between;
+    # motion_threshold: also detect when the scene changed by more than this
+    # mean grey level since the last detection (0 = off)
     cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+        output_path = tmp_file.name
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    schedule = DetectionSchedule(detect_every, motion_threshold)
+    tracker = Tracker()
     frames = []
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame_copy = frame.copy()
-        outputs = model.predict(source=frame)
-        results = outputs[0].cpu().numpy()
-        for i, det in enumerate(results.boxes.xyxy):
-            cv2.rectangle(
-                frame_copy,
-                (int(det[0]), int(det[1])),
-                (int(det[2]), int(det[3])),
-                color=(0, 0, 255),
-                thickness=2,
-                lineType=cv2.LINE_AA
-            )
-            cv2.putText(
-                frame_copy,
-                f"{results.names[int(det[-1])]}: {det[-2]:.2f}",
-                (int(det[0]), int(det[1]) - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2,
-                cv2.LINE_AA
-            )
-        frames.append(cv2.cvtColor(frame_copy, cv2.COLOR_BGR2RGB))
-    cap.release()
-    return frames
+    detect = []
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+            detect.append(schedule.should_detect(frame))
+            # a chunk is batch_size frames whatever detect_every, so memory
+            # stays flat and no model.predict call is larger than batch_size
+            if len(frames) == batch_size:
+                annotate_batch(frames, detect, out, tracker)
+                frames = []
+                detect = []
+        if frames:
+            annotate_batch(frames, detect, out, tracker)
+    finally:
+        cap.release()
+        out.release()
+    return output_path
 
 inputs_video = [
     gr.components.Video(type="filepath", label="Input Video"),
+    gr.components.Slider(minimum=1, maximum=10, value=1, step=1, label="Detect Every N Frames"),
+    gr.components.Slider(minimum=0, maximum=50, value=0, step=1, label="Re-detect On Motion (0 = off)"),
 ]
 outputs_video = [
-    gr.components.Video(type="numpy", label="Output Video"),
+    gr.components.Video(label="Output Video"),
 ]
 interface_video = gr.Interface(
     fn=show_preds_video,
@@ -0,0 +1,139 @@
+import cv2
+import numpy as np
+from filterpy.kalman import KalmanFilter
+from scipy.optimize import linear_sum_assignment
+
+# SORT-style tracking, so the detector can run on every Nth frame only and
+# the boxes in between are carried forward by a constant-velocity Kalman
+# filter per vehicle. Detections are matched to tracks by IoU; a track keeps
+# its id for as long as it is matched, which makes the ids usable for
+# counting vehicles.
+
+
+def iou_matrix(boxes_a, boxes_b):
+    # IoU of every box in boxes_a with every box in boxes_b, both (n, 4) x1 y1 x2 y2
+    a = boxes_a[:, None, :4]
+    b = boxes_b[None, :, :4]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def box_to_z(box):
+    # x1 y1 x2 y2 -> centre x, centre y, area, aspect ratio
+    w = box[2] - box[0]
+    h = box[3] - box[1]
+    return np.array([box[0] + w / 2, box[1] + h / 2, w * h, w / max(h, 1e-9)]).reshape(4, 1)
+
+
+def x_to_box(x):
+    w = np.sqrt(max(x[2, 0] * x[3, 0], 0))
+    h = x[2, 0] / w if w > 0 else 0
+    return np.array([x[0, 0] - w / 2, x[1, 0] - h / 2, x[0, 0] + w / 2, x[1, 0] + h / 2])
+
+
+class Track:
+    def __init__(self, track_id, detection):
+        kf = KalmanFilter(dim_x=7, dim_z=4)
+        kf.F = np.eye(7)
+        kf.F[0, 4] = kf.F[1, 5] = kf.F[2, 6] = 1
+        kf.H = np.eye(4, 7)
+        kf.R[2:, 2:] *= 10.
+        kf.P[4:, 4:] *= 1000.  # the velocity is unknown at first
+        kf.P *= 10.
+        kf.Q[-1, -1] *= 0.01
+        kf.Q[4:, 4:] *= 0.01
+        kf.x[:4] = box_to_z(detection)
+        self.kf = kf
+        self.id = track_id
+        self.conf = detection[4]
+        self.cls = detection[5]
+        self.missed = 0  # detection rounds in a row without a match
+
+    def predict(self):
+        if self.kf.x[6, 0] + self.kf.x[2, 0] <= 0:
+            self.kf.x[6, 0] = 0
+        self.kf.predict()
+
+    def correct(self, detection):
+        self.kf.update(box_to_z(detection))
+        self.conf = detection[4]
+        self.cls = detection[5]
+        self.missed = 0
+
+    def box(self):
+        return x_to_box(self.kf.x)
+
+
+class Tracker:
+    def __init__(self, iou_threshold=0.3, max_missed=1):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed  # detection rounds a track survives unmatched
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, detections):
+        # a frame that went through the detector; detections are (n, 6)
+        # rows of x1 y1 x2 y2 conf cls
+        for track in self.tracks:
+            track.predict()
+        detections = np.asarray(detections, dtype=float).reshape(-1, 6)
+        matched_tracks = set()
+        matched_detections = set()
+        if self.tracks and len(detections):
+            predicted = np.array([track.box() for track in self.tracks])
+            iou = iou_matrix(detections, predicted)
+            for d, t in zip(*linear_sum_assignment(-iou)):
+                if iou[d, t] >= self.iou_threshold:
+                    self.tracks[t].correct(detections[d])
+                    matched_tracks.add(t)
+                    matched_detections.add(d)
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        for d, detection in enumerate(detections):
+            if d not in matched_detections:
+                self.tracks.append(Track(self.next_id, detection))
+                self.next_id += 1
+        return self.active()
+
+    def predict(self):
+        # a frame the detector skipped: every track moves on by its velocity
+        for track in self.tracks:
+            track.predict()
+        return self.active()
+
+    def active(self):
+        # (n, 7) rows of x1 y1 x2 y2 conf cls id for the tracks matched at
+        # the last detection
+        rows = [np.concatenate([track.box(), [track.conf, track.cls, track.id]])
+                for track in self.tracks if track.missed == 0]
+        return np.array(rows).reshape(-1, 7)
+
+
+class DetectionSchedule:
+    # decides which frames go through the detector: every detect_every-th
+    # frame, and any frame that differs from the last detected one by more
+    # than motion_threshold (mean absolute grey level, 0 = off)
+    def __init__(self, detect_every=1, motion_threshold=0):
+        self.detect_every = max(int(detect_every), 1)
+        self.motion_threshold = motion_threshold
+        self.index = 0
+        self.last_detected = None
+
+    def thumbnail(self, frame):
+        return cv2.cvtColor(cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    def should_detect(self, frame):
+        detect = self.index % self.detect_every == 0
+        if not detect and self.motion_threshold > 0:
+            difference = cv2.absdiff(self.thumbnail(frame), self.last_detected)
+            detect = float(difference.mean()) > self.motion_threshold
+        if detect and self.motion_threshold > 0:
+            self.last_detected = self.thumbnail(frame)
+        self.index += 1
+        return detect